@@ -2,6 +2,7 @@ from tkinter import *
 from functools import partial  # to prevent unwanted windows
 import all_constants as c
 import conversion_rounding as cr
+import units
 
 
 class Converter:
@@ -111,11 +112,14 @@ class Converter:
 
     def convert(self, min_temp, to_convert):
         if min_temp == c.ABS_ZERO_GRAMS:
-            answer = cr.to_ounces(to_convert)
-            answer_statement = f"{to_convert}°C is {answer}°F"  # Fixed parentheses here
+            from_unit, to_unit = "g", "oz"
         else:
-            answer = cr.to_grams(to_convert)
-            answer_statement = f"{to_convert}°F is {answer}°C"  # Fixed parentheses here
+            from_unit, to_unit = "oz", "g"
+
+        # shared conversion kernel (same code path as the other converters)
+        answer = cr.format_ans(cr.convert_value(to_convert, from_unit, to_unit))
+        answer_statement = (f"{to_convert}{units.UNIT_LABELS[from_unit]} is "
+                            f"{answer}{units.UNIT_LABELS[to_unit]}")
 
         # Enable history export button as soon as we have a valid calculation
         self.to_history_button.config(state=NORMAL)
@@ -246,23 +246,10 @@ class HistoryExport:
         recent_intro_txt = (f"Below are {calc_amount} calculations "
                             "(to the nearest degree).")
 
-        # Create string from calculations list (new calculations first)
-        newest_first_string = ""
-        newest_first_list = list(reversed(calculations))
-
-        if len(newest_first_list) <= c.MAX_CALCS:
-
-            for item in newest_first_list[:-1]:
-                newest_first_string += item + "\n"
-
-            newest_first_string += newest_first_list[-1]
-
-        # If we have more than five items...
-        else:
-            for item in newest_first_list[:c.MAX_CALCS - 1]:
-                newest_first_string += item + "\n"
-
-            newest_first_string += newest_first_list[c.MAX_CALCS - 1]
+        # Create string from calculations list (new calculations first),
+        # only the last few items are reversed and joined in one go
+        newest_first_list = calculations[-c.MAX_CALCS:]
+        newest_first_string = "\n".join(reversed(newest_first_list))
 
         export_instruction_txt = ("Please push <Export> to save your calculations in"
                                   "file. If the filename already exists, it will be replaced.")
@@ -1,35 +1,25 @@
+import sys
+import time
+
+START_TIME = time.perf_counter()  # before the imports below, for --time-startup
+
 from tkinter import *
+from tkinter import ttk
 from functools import partial  # to prevent unwanted windows
 import all_constants as c
-import conversion_rounding as cr
-from datetime import date
-
-
-# ---------- Helper functions ----------
-
-def build_calculation_string(calculations, max_calcs):
-    """Return a newline-separated string of calculations, newest first."""
-    newest_first_list = list(reversed(calculations))
-    if len(newest_first_list) <= max_calcs:
-        return "\n".join(newest_first_list)
-    return "\n".join(newest_first_list[:max_calcs])
-
+from history_view import HistoryListView
+from theme import Theme, LIST_BACKGROUNDS
+from weight_core import ConverterCore
+import units
 
-def recolour_widgets(widgets, bg):
-    """Apply a background colour to multiple widgets."""
-    for w in widgets:
-        w.config(bg=bg)
+# datetime, the export code, instrumentation and profiling are imported
+# when they are first used, so they don't slow down start-up
+IMPORTS_DONE = time.perf_counter()
 
-def export_calculations_to_txt(filename, calculations, date_obj):
-    """Write calculations to a .txt file with header and date."""
-    day, month, year = date_obj.strftime("%d"), date_obj.strftime("%m"), date_obj.strftime("%Y")
-
-    with open(f"{filename}.txt", "w") as text_file:
-        text_file.write("***** Weight Calculations ******\n")
-        text_file.write(f"Generated: {day}/{month}/{year}\n\n")
-        text_file.write("Here is your calculation history (oldest to newest)...\n")
-        for item in calculations:
-            text_file.write(item + "\n")
+EXPORT_POLL_MS = 50  # how often the history window checks on a running export
+FLUSH_MS = 2000  # how often batched calculations are written to a history database
+LIVE_DELAY_MS = 250  # pause in typing before a live conversion is shown
+LIVE_SETTLE_MS = 1500  # pause in typing before a live conversion is added to the history
 
 
 # ---------- Main Converter Class ----------
@@ -39,23 +29,34 @@ class Converter:
     Weight conversion tool
     """
 
-    def __init__(self):
-        self.all_calculations_list = []
+    def __init__(self, history_db=None, metrics=None, live=False):
+        self.core = ConverterCore(history_db=history_db)
+        self.all_calculations_list = self.core.all_calculations_list
+
+        # optional counters and latency histograms (see instrumentation.py)
+        self.metrics = metrics
+        if metrics:
+            metrics.instrument(self, {"check_weight": "check_weight", "convert": "convert",
+                                      "live_preview": "live_preview",
+                                      "to_help": "open_help", "to_history": "open_history"})
+
+        # shared fonts and styles (see theme.py)
+        self.theme = Theme()
 
-        self.weight_frame = Frame(padx=10, pady=10)
+        self.weight_frame = ttk.Frame(padding=10)
         self.weight_frame.grid()
 
-        self.weight_heading = Label(
+        self.weight_heading = ttk.Label(
             self.weight_frame,
             text="Weight Convertor",
-            font=("Arial", 16, "bold")
+            style="Heading.TLabel"
         )
         self.weight_heading.grid(row=0)
 
         instructions = ("Please enter a weight below and then press "
                         "one of the buttons to convert it from Grams "
                         "to Ounces.")
-        self.weight_instructions = Label(
+        self.weight_instructions = ttk.Label(
             self.weight_frame,
             text=instructions,
             wraplength=250, width=40,
@@ -63,33 +64,34 @@ class Converter:
         )
         self.weight_instructions.grid(row=1)
 
-        self.weight_entry = Entry(self.weight_frame, font=("Arial", 14))
+        self.weight_entry = ttk.Entry(self.weight_frame, font=self.theme.fonts["entry"])
         self.weight_entry.grid(row=2, padx=10, pady=10)
 
         error = "Please enter a number"
-        self.answer_error = Label(
+        self.answer_error = ttk.Label(
             self.weight_frame, text=error,
-            fg="#084C99", font=("Arial", 14, "bold")
+            style="Answer.TLabel"
         )
         self.answer_error.grid(row=3)
+        self.has_error = False
 
         # Conversion, help and history / export buttons
-        self.button_frame = Frame(self.weight_frame)
+        self.button_frame = ttk.Frame(self.weight_frame)
         self.button_frame.grid(row=4)
 
+        # button list (button text | style | command | row | column)
         button_details_list = [
-            ["To Grams", "#692617", lambda: self.check_weight(c.ABS_ZERO_OUNCES), 0, 0],
-            ["To Ounces", "#193A75", lambda: self.check_weight(c.ABS_ZERO_GRAMS), 0, 1],
-            ["Help / Info", "#3F1975", self.to_help, 1, 0],
-            ["History / Export", "#00B3A4", self.to_history, 1, 1]
+            ["To Grams", "Grams.TButton", lambda: self.check_weight("oz", "g"), 0, 0],
+            ["To Ounces", "Ounces.TButton", lambda: self.check_weight("g", "oz"), 0, 1],
+            ["Help / Info", "Help.TButton", self.to_help, 1, 0],
+            ["History / Export", "History.TButton", self.to_history, 1, 1]
         ]
 
         self.button_ref_list = []
         for item in button_details_list:
-            make_button = Button(
+            make_button = ttk.Button(
                 self.button_frame,
-                text=item[0], bg=item[1],
-                fg="#FFFFFF", font=("Arial", 12, "bold"),
+                text=item[0], style=item[1],
                 width=12, command=item[2]
             )
             make_button.grid(row=item[3], column=item[4], padx=5, pady=5)
@@ -97,50 +99,141 @@ class Converter:
 
         self.to_help_button = self.button_ref_list[2]
         self.to_history_button = self.button_ref_list[3]
-        self.to_history_button.config(state=DISABLED)
+        if not len(self.all_calculations_list):
+            self.to_history_button.config(state=DISABLED)
+
+        # convert as you type - the answer is shown once typing pauses, and only
+        # recorded in the history once it has settled
+        self.live = BooleanVar(value=live)
+        self.live_direction = ("g", "oz")  # last conversion button pressed
+        self.live_recorded = None
+        self.live_job = None
+        self.settle_job = None
+
+        self.live_check = ttk.Checkbutton(self.weight_frame, text="Convert as I type",
+                                          variable=self.live, command=self.cancel_live)
+        self.live_check.grid(row=5)
+        self.weight_entry.bind("<KeyRelease>", self.on_key)
+
+        # dialogs are built the first time they are opened, then hidden and shown again
+        self.help_window = None
+        self.history_window = None
+
+        if history_db:
+            self.weight_frame.after(FLUSH_MS, self.flush_history)
+
+    def flush_history(self):
+        """Write batched calculations to the history database every so often."""
+        self.core.flush()
+        self.weight_frame.after(FLUSH_MS, self.flush_history)
+
+    def close(self, root):
+        """Save any batched calculations, then close the program."""
+        self.cancel_live()
+        try:
+            self.core.close()
+        finally:
+            # the window must still close if the last save fails
+            root.destroy()
 
-    def check_weight(self, min_weight):
+    def check_weight(self, from_unit, to_unit):
         """Check if weight input is valid and run conversion."""
-        to_convert = self.weight_entry.get().strip()
+        # live conversions now go this way too
+        self.live_direction = (from_unit, to_unit)
+        self.cancel_live()
 
-        self.answer_error.config(fg="#004C99", font=("Arial", 13, "bold"))
-        self.weight_entry.config(bg="#FFFFFF")
+        to_convert = self.read_weight(from_unit, clear_on_error=True)
+        if to_convert is not None:
+            self.convert(from_unit, to_unit, to_convert)
 
-        error = f"Enter a number more than / equal to {min_weight}"
-        has_errors = False
+    def read_weight(self, from_unit, clear_on_error=False):
+        """
+        Reads the weight entry, showing an error if it isn't valid
+        :return: The weight as a float (None if it isn't valid)
+        """
+        to_convert = self.weight_entry.get()
 
         try:
-            to_convert = float(to_convert)
-            if to_convert >= min_weight:
-                self.convert(min_weight, to_convert)
-            else:
-                has_errors = True
-        except ValueError:
-            has_errors = True
-
-        if has_errors:
-            self.answer_error.config(text=error, fg="#9C0000", font=("Arial", 10, "bold"))
-            self.weight_entry.config(bg="#F4CCCC")
-            self.weight_entry.delete(0, END)
-
-    def convert(self, min_weight, to_convert):
-        if min_weight == c.ABS_ZERO_GRAMS:
-            answer = cr.to_ounces(to_convert)
-            answer_statement = f"{to_convert}G is {answer}Oz"
-        else:
-            answer = cr.to_grams(to_convert)
-            answer_statement = f"{to_convert}Oz is {answer}G"
-
-        self.to_history_button.config(state=NORMAL)
+            to_convert = self.core.check_weight(to_convert, from_unit)
+        except ValueError as error:
+            if self.metrics:
+                self.metrics.count("check_weight.rejected")
+            self.answer_error.config(text=str(error))
+            self.set_error_state(True)
+            if clear_on_error:
+                self.weight_entry.delete(0, END)
+            return None
+
+        self.set_error_state(False)
+        return to_convert
+
+    def set_error_state(self, has_error):
+        """Switch the answer and entry between their normal and error styles."""
+        if has_error == self.has_error:
+            return
+
+        self.has_error = has_error
+        self.answer_error.config(style="Error.TLabel" if has_error else "Answer.TLabel")
+        self.weight_entry.config(style="Error.TEntry" if has_error else "TEntry")
+
+    def convert(self, from_unit, to_unit, to_convert):
+        answer_statement = self.core.convert(from_unit, to_unit, to_convert)
+        self.live_recorded = (from_unit, to_unit, to_convert)
+
+        # the history button stays disabled while the history window is open
+        if self.history_window is None or not self.history_window.showing:
+            self.to_history_button.config(state=NORMAL)
         self.answer_error.config(text=answer_statement)
-        self.all_calculations_list.append(answer_statement)
-        print(self.all_calculations_list)
+
+        if self.metrics:
+            self.metrics.count(f"convert.{from_unit}_to_{to_unit}")
+
+    def on_key(self, event=None):
+        """Restart the live conversion timers (so a burst of typing is converted once)."""
+        if not self.live.get():
+            return
+
+        self.cancel_live()
+        if self.weight_entry.get().strip():
+            self.live_job = self.weight_frame.after(LIVE_DELAY_MS, self.live_preview)
+            self.settle_job = self.weight_frame.after(LIVE_SETTLE_MS, self.live_settle)
+
+    def cancel_live(self):
+        """Forget any live conversions that haven't happened yet."""
+        for job in (self.live_job, self.settle_job):
+            if job is not None:
+                self.weight_frame.after_cancel(job)
+        self.live_job = self.settle_job = None
+
+    def live_preview(self):
+        """Show the answer for what has been typed so far (without recording it)."""
+        self.live_job = None
+        from_unit, to_unit = self.live_direction
+
+        to_convert = self.read_weight(from_unit)
+        if to_convert is not None:
+            self.answer_error.config(text=self.core.preview(from_unit, to_unit, to_convert))
+
+    def live_settle(self):
+        """Typing has stopped - record the conversion (once) in the history."""
+        self.settle_job = None
+        from_unit, to_unit = self.live_direction
+
+        to_convert = self.read_weight(from_unit)
+        if to_convert is not None and (from_unit, to_unit, to_convert) != self.live_recorded:
+            self.convert(from_unit, to_unit, to_convert)
 
     def to_help(self):
-        DisplayHelp(self)
+        if self.help_window is None:
+            self.help_window = DisplayHelp(self)
+        else:
+            self.help_window.show(self)
 
     def to_history(self):
-        HistoryExport(self, self.all_calculations_list)
+        if self.history_window is None:
+            self.history_window = HistoryExport(self, self.core)
+        else:
+            self.history_window.show(self, self.core)
 
 
 # ---------- Help Window ----------
@@ -148,20 +241,20 @@ class Converter:
 class DisplayHelp:
 
     def __init__(self, partner):
-        background = "#CCDAFF"
         self.help_box = Toplevel()
 
         partner.to_help_button.config(state=DISABLED)
         self.help_box.protocol('WM_DELETE_WINDOW',
                                partial(self.close_help, partner))
 
-        self.help_frame = Frame(self.help_box, width=300, height=200)
+        self.help_frame = ttk.Frame(self.help_box, width=300, height=200,
+                                    style="Help.TFrame")
         self.help_frame.grid()
 
-        self.help_heading_label = Label(
+        self.help_heading_label = ttk.Label(
             self.help_frame,
             text="Help / Info",
-            font=("Arial", 14, "bold")
+            style="HelpHeading.TLabel"
         )
         self.help_heading_label.grid(row=0)
 
@@ -171,120 +264,317 @@ class DisplayHelp:
                      "Please note that you cannot input a weight value below 0. "
                      "If you try to convert a weight that is less than 0, "
                      "you will get an error message.\n\n"
+                     "Tick 'Convert as I type' to see the answer while you type "
+                     "(using the last button you pressed).\n\n"
                      "To see your calculation history and export it to a text "
                      "file, please click the 'History / Export' button.")
 
-        self.help_text_label = Label(
+        self.help_text_label = ttk.Label(
             self.help_frame,
             text=help_text, wraplength=350,
-            justify="left"
+            justify="left", style="Help.TLabel"
         )
         self.help_text_label.grid(row=1, padx=10)
 
-        self.dismiss_button = Button(
+        self.dismiss_button = ttk.Button(
             self.help_frame,
-            font=("Arial", 12, "bold"),
-            text="Dismiss", bg="#005CCC",
-            fg="#FFFFFF",
+            text="Dismiss", style="Dismiss.TButton",
             command=partial(self.close_help, partner)
         )
         self.dismiss_button.grid(row=2, padx=10, pady=10)
 
-        recolour_widgets([self.help_frame, self.help_heading_label,
-                          self.help_text_label], background)
+    def show(self, partner):
+        """Show the (hidden) help window again."""
+        partner.to_help_button.config(state=DISABLED)
+        self.help_box.deiconify()
+        self.help_box.lift()
 
     def close_help(self, partner):
+        # hide rather than destroy, so opening help again is instant
         partner.to_help_button.config(state=NORMAL)
-        self.help_box.destroy()
+        self.help_box.withdraw()
 
 
 # ---------- History / Export Window ----------
 
 class HistoryExport:
 
-    def __init__(self, partner, calculations):
+    def __init__(self, partner, core):
         self.history_box = Toplevel()
 
-        partner.to_history_button.config(state=DISABLED)
         self.history_box.protocol('WM_DELETE_WINDOW',
-                                  partial(self.close_history, partner))
+                                  partial(self.close_history, partner, core))
+        self.showing = False  # True from show() until close_history()
 
-        self.history_frame = Frame(self.history_box)
+        self.history_frame = ttk.Frame(self.history_box)
         self.history_frame.grid()
 
-        if len(calculations) <= c.MAX_CALCS:
-            calc_back = "#D5E8D4"
-            calc_amount = "all your"
-        else:
-            calc_back = "#ffe6cc"
-            calc_amount = (f"your recent calculations - "
-                           f"showing {c.MAX_CALCS} / {len(calculations)}")
-
-        recent_intro_txt = (f"Below are {calc_amount} calculations "
-                           )
-
-        newest_first_string = build_calculation_string(calculations, c.MAX_CALCS)
-
         export_instruction_txt = ("Please push <Export> to save your calculations in "
-                                  "a file. If the filename already exists, it will be replaced.")
+                                  "a file. Exporting again today adds any new calculations "
+                                  "to the same file.")
 
+        # label list (label text | style)
         history_labels_list = [
-            ["History / Export", ("Arial", 16, "bold"), None],
-            [recent_intro_txt, ("Arial", 11), None],
-            [newest_first_string, ("Arial", 14), calc_back],
-            [export_instruction_txt, ("Arial", 11), None],
+            ["History / Export", "Heading.TLabel"],
+            ["", "TLabel"],
+            ["", "Small.TLabel"],
+            [export_instruction_txt, "TLabel"],
         ]
 
         history_label_ref = []
         for count, item in enumerate(history_labels_list):
-            make_label = Label(
-                self.history_box, text=item[0], font=item[1],
-                bg=item[2],
-                wraplength=300, justify="left", pady=10, padx=20
+            make_label = ttk.Label(
+                self.history_box, text=item[0], style=item[1],
+                wraplength=300, justify="left", padding=(20, 10)
             )
-            make_label.grid(row=count)
+            # leave rows 2 and 3 for the filter bar and list of calculations
+            make_label.grid(row=count if count < 2 else count + 2)
             history_label_ref.append(make_label)
 
+        self.recent_intro_label = history_label_ref[1]
+        self.stats_label = history_label_ref[2]
         self.export_filename_label = history_label_ref[3]
 
-        self.history_button_frame = Frame(self.history_box)
-        self.history_button_frame.grid(row=4)
-
+        # filter bar (unit | smallest | largest | Filter | Clear)
+        self.filter = None
+        self.filter_frame = ttk.Frame(self.history_box)
+        self.filter_frame.grid(row=2, padx=20)
+
+        self.filter_unit = StringVar(value="g")
+        ttk.OptionMenu(self.filter_frame, self.filter_unit, "g",
+                       *units.UNIT_CODES).grid(row=0, column=0)
+
+        ttk.Label(self.filter_frame, text="from").grid(row=0, column=1)
+        self.filter_low_entry = ttk.Entry(self.filter_frame, width=7)
+        self.filter_low_entry.grid(row=0, column=2)
+        ttk.Label(self.filter_frame, text="to").grid(row=0, column=3)
+        self.filter_high_entry = ttk.Entry(self.filter_frame, width=7)
+        self.filter_high_entry.grid(row=0, column=4)
+
+        for column, (text, command) in enumerate([("Filter", partial(self.apply_filter, core)),
+                                                  ("Clear", partial(self.clear_filter, core))]):
+            ttk.Button(self.filter_frame, text=text, width=6,
+                       command=command).grid(row=0, column=5 + column, padx=2)
+
+        # scrollable list that only renders the rows on screen
+        self.history_list = HistoryListView(self.history_box, core.all_calculations_list,
+                                            rows=c.MAX_CALCS,
+                                            font=partner.theme.fonts["list"])
+        self.history_list.frame.grid(row=3, padx=20)
+
+        self.history_button_frame = ttk.Frame(self.history_box)
+        self.history_button_frame.grid(row=6)
+
+        # button list (button text | style | command | row | column)
         button_details_list = [
-            ["Export", "#004C99", lambda: self.export_data(calculations), 0, 0],
-            ["Close", "#666666", partial(self.close_history, partner), 0, 1],
+            ["Export", "Export.TButton", lambda: self.export_data(core), 0, 0],
+            ["Close", "Close.TButton", partial(self.close_history, partner, core), 0, 1],
         ]
 
+        history_button_ref = []
         for btn in button_details_list:
-            make_button = Button(
+            make_button = ttk.Button(
                 self.history_button_frame,
-                font=("Arial", 12, "bold"),
-                text=btn[0], bg=btn[1],
-                fg="#FFFFFF", width=12,
-                command=btn[2]
+                text=btn[0], style=btn[1],
+                width=12, command=btn[2]
             )
             make_button.grid(row=btn[3], column=btn[4], padx=10, pady=10)
+            history_button_ref.append(make_button)
 
-    def export_data(self, calculations):
-        today = date.today()
-        file_name = f"weights_{today.strftime('%Y_%m_%d')}"
-        success_string = f"Export Successful! The file is called {file_name}.txt"
+        self.export_button = history_button_ref[0]
+        self.export_job = None
 
-        self.export_filename_label.config(
-            bg="#009900", text=success_string, font=("Arial", 12, "bold")
-        )
+        self.metrics = partner.metrics
+        if self.metrics:
+            self.metrics.instrument(self, {"export_data": "export_data"})
+            self.metrics.instrument(self.history_list, {"draw": "history_draw"})
+
+        self.show(partner, core)
+
+    def show(self, partner, core):
+        """Bring the history up to date, then show the window (again)."""
+        partner.to_history_button.config(state=DISABLED)
+        self.showing = True
+
+        # fill in the history text and keep it up to date while we are open
+        self.refresh(core)
+        core.add_listener(self.refresh)
 
-        export_calculations_to_txt(file_name, calculations, today)
+        self.history_box.deiconify()
+        self.history_box.lift()
 
-    def close_history(self, partner):
+    def export_data(self, core):
+        """Start exporting on a worker thread (so the window doesn't freeze)."""
+        from datetime import date
+
+        self.export_button.config(state=DISABLED)
+        self.export_filename_label.config(text="Exporting...", style="TLabel")
+
+        self.export_job = core.export_in_background(date.today())
+        self.history_box.after(EXPORT_POLL_MS, self.poll_export)
+
+    def poll_export(self):
+        """Show progress from the export worker until it has finished."""
+        from queue import Empty
+
+        try:
+            while True:
+                message = self.export_job.messages.get_nowait()
+
+                if message[0] == "progress":
+                    _, done, total = message
+                    self.export_filename_label.config(
+                        text=f"Exporting... {done:,} / {total:,} calculations")
+
+                elif message[0] == "done":
+                    _, file_name, written, taken = message
+                    if self.metrics:
+                        self.metrics.observe("export_write", taken)
+                        self.metrics.count("export.bytes", written)
+                    success_string = (f"Export Successful! The file is called {file_name} "
+                                      f"({written:,} bytes written in {taken:.2f}s)")
+                    self.export_filename_label.config(text=success_string,
+                                                      style="Success.TLabel")
+                    self.export_button.config(state=NORMAL)
+                    return
+
+                else:
+                    self.export_filename_label.config(text=f"Export failed: {message[1]}",
+                                                      style="Failed.TLabel")
+                    self.export_button.config(state=NORMAL)
+                    return
+        except Empty:
+            pass
+
+        self.history_box.after(EXPORT_POLL_MS, self.poll_export)
+
+    def refresh(self, core):
+        """Show the core's (already rendered) recent history, or re-run the filter."""
+        stats_lines = core.stats.lines()
+        self.stats_label.config(text="\n".join(["This session:", *stats_lines]) if stats_lines
+                                else "No conversions yet this session")
+
+        if self.filter is not None:
+            self.show_filtered(core, keep_position=True)
+            return
+
+        calc_back = LIST_BACKGROUNDS["all" if core.showing_all else "recent"]
+        self.recent_intro_label.config(text=core.recent_intro)
+        self.history_list.listbox.config(bg=calc_back)
+        self.history_list.refresh()
+
+    def apply_filter(self, core):
+        """Read the filter bar and show the matching calculations."""
+        limits = []
+        for entry in (self.filter_low_entry, self.filter_high_entry):
+            text = entry.get().strip()
+            try:
+                limits.append(float(text) if text else None)
+            except ValueError:
+                self.recent_intro_label.config(text="Filter limits must be numbers (or blank)")
+                return
+
+        self.filter = (self.filter_unit.get(), *limits)
+        self.show_filtered(core)
+
+    def show_filtered(self, core, keep_position=False):
+        from_unit, low, high = self.filter
+        matches = core.filter_history(from_unit, low, high)
+
+        low_txt = "any" if low is None else low
+        high_txt = "any" if high is None else high
+        self.recent_intro_label.config(
+            text=f"{len(matches):,} calculations from {units.UNIT_NAMES[from_unit]} "
+                 f"between {low_txt} and {high_txt} (largest first)")
+        self.history_list.listbox.config(bg=LIST_BACKGROUNDS["filtered"])
+        self.history_list.set_source(matches, keep_position)
+
+    def clear_filter(self, core):
+        """Go back to showing every calculation."""
+        self.filter = None
+        self.filter_low_entry.delete(0, END)
+        self.filter_high_entry.delete(0, END)
+        self.history_list.set_source(core.all_calculations_list)
+        self.refresh(core)
+
+    def close_history(self, partner, core):
+        # hide rather than destroy, so opening history again is instant
+        # (a running export carries on and its result is there next time)
+        core.remove_listener(self.refresh)
+        self.showing = False
         partner.to_history_button.config(state=NORMAL)
-        self.history_box.destroy()
+        self.history_box.withdraw()
+
+
+# ---------- Start-up timing ----------
+
+def report_startup(root, converter, window_built):
+    """Print how long start-up took once the first frame is drawn, then close."""
+    root.update_idletasks()
+    first_frame = time.perf_counter()
+
+    print(f"startup: imports {(IMPORTS_DONE - START_TIME) * 1000:.1f} ms, "
+          f"window built {(window_built - START_TIME) * 1000:.1f} ms, "
+          f"first frame {(first_frame - START_TIME) * 1000:.1f} ms "
+          f"(first frame at {time.time():.6f})", file=sys.stderr)
+    converter.close(root)
 
 
 # ---------- Main Routine ----------
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Weight Convertor")
+    parser.add_argument("--history-db", metavar="FILE",
+                        help="keep the calculation history in this SQLite file")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="record counters and latency histograms and write them to "
+                             "this JSON file at exit (press F12 to write them at any time)")
+    parser.add_argument("--profile", metavar="PREFIX",
+                        help="run under cProfile and tracemalloc, writing PREFIX.pstats and "
+                             "PREFIX_allocations.txt at exit")
+    parser.add_argument("--snapshot-every", type=int, default=100, metavar="N",
+                        help="take a tracemalloc snapshot every N conversions (with --profile)")
+    parser.add_argument("--live", action="store_true",
+                        help="start with 'Convert as I type' switched on")
+    parser.add_argument("--time-startup", action="store_true",
+                        help="print how long start-up took and close after the first frame")
+    args = parser.parse_args()
+
+    profiler = None
+    if args.profile:
+        from session_profiler import SessionProfiler
+        profiler = SessionProfiler(args.profile, args.snapshot_every).start()
+
+    metrics = None
+    if args.metrics:
+        from instrumentation import Instruments
+        metrics = Instruments(args.metrics)
+        metrics.dump_at_exit()
+
+    history_in_use = ()
+    if args.history_db:
+        from history_sqlite import HistoryInUseError
+        history_in_use = HistoryInUseError
+
     root = Tk()
     root.title("Weight Convertor")
-    Converter()
+    try:
+        converter = Converter(args.history_db, metrics, args.live)
+    except history_in_use as error:
+        # the history file is open in another converter window
+        root.destroy()
+        parser.error(str(error))
+    if metrics:
+        root.bind("<F12>", lambda event: metrics.dump())
+    if profiler:
+        converter.core.add_listener(profiler.on_conversion)
+    root.protocol('WM_DELETE_WINDOW', partial(converter.close, root))
+    if args.time_startup:
+        root.after_idle(report_startup, root, converter, time.perf_counter())
     root.mainloop()
+
+    if profiler:
+        for written in profiler.stop():
+            print(f"Profile written to {written}")
@@ -1,5 +1,24 @@
-# constants used to convert temperatures...
+# constants used to convert temperatures and weights...
+
+# smallest value allowed for each unit code (see units.py)
+LOWER_BOUNDS = {
+    "mg": 100.0,
+    "g": 0.1,
+    "kg": 0.0001,
+    "oz": 0.01,
+    "lb": 0.001,
+    "st": 0.0001,
+    "ct": 0.5,
+    "ozt": 0.01,
+    "c": -273.15,
+    "f": -459.67,
+    "k": 0.0,
+}
+
+# kept for the earlier versions of the program
+ABS_ZERO_GRAMS = LOWER_BOUNDS["g"]
+ABS_ZERO_OUNCES = LOWER_BOUNDS["oz"]
+ABS_ZERO_CELSIUS = LOWER_BOUNDS["c"]
+ABS_ZERO_FAHRENHEIT = LOWER_BOUNDS["f"]
 
-ABS_ZERO_GRAMS = 0.1
-ABS_ZERO_OUNCES = 0.01
 MAX_CALCS = 5
@@ -0,0 +1,471 @@
+"""
+Benchmarks for the weight converter helpers.
+
+Run with:  python benchmarks.py [benchmark ...] [--count N] [--workers N]
+
+The 'suite' benchmark times the conversion, history and export paths and
+can save the results as a JSON baseline, or compare against one:
+
+    python benchmarks.py suite --save baseline.json
+    python benchmarks.py suite --compare baseline.json [--threshold 10]
+
+It exits with status 1 if anything got slower than the threshold allows.
+
+The 'startup' benchmark cold-starts the GUI and exits with status 1 if the
+first frame takes longer than --budget-ms to appear.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from array import array
+from datetime import date
+
+import conversion_rounding as cr
+
+
+def time_it(func, *args, repeat=3, **kwargs):
+    """Return the best wall-clock time (seconds) out of a few runs of func."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        taken = time.perf_counter() - start
+        if best is None or taken < best:
+            best = taken
+    return best
+
+
+def time_per_call(func, *args, repeat=5):
+    """Return the best time (seconds) for one call of a (possibly very quick) func."""
+    timer = timeit.Timer(lambda: func(*args))
+    loops, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=loops)) / loops
+
+
+def per_call_loop(values):
+    """Convert one value at a time, the way the GUI does it today."""
+    return [cr.to_ounces_value(val) for val in values]
+
+
+def bench_batch_conversion(count=1_000_000):
+    """Compare the batch G -> Oz conversion against the per-call loop."""
+    rng = random.Random(42)
+    values = array("d", (rng.uniform(0.1, 5000) for _ in range(count)))
+
+    # the batch result must be identical to the scalar one
+    expected = per_call_loop(values)
+    assert list(cr.to_ounces_batch(values)) == expected, "batch != scalar"
+
+    loop_time = time_it(per_call_loop, values)
+    batch_time = time_it(cr.to_ounces_batch, values)
+
+    backend = "numpy" if cr.np is not None else "array"
+    print(f"---- batch conversion ({count:,} values, {backend} backend) ----")
+    print(f"per-call loop : {count / loop_time:>14,.0f} values/sec")
+    print(f"batch         : {count / batch_time:>14,.0f} values/sec")
+    print(f"speed up      : {loop_time / batch_time:>14.1f}x")
+
+
+def bench_unit_registry():
+    """Time how long the unit registry takes to compile its factor matrix."""
+    import units
+
+    build_time = time_it(units.build_factor_matrix, units.UNIT_CODES, units.EDGES,
+                         repeat=20)
+    size = len(units.UNIT_CODES)
+    print(f"---- unit registry ({size} x {size} factor matrix) ----")
+    print(f"build time    : {build_time * 1e6:>14.1f} us")
+
+
+def bench_parallel_scaling(count=2_000_000, max_workers=None):
+    """Time the multi-process text conversion with 1 to N workers."""
+    import weight_cli
+
+    max_workers = max_workers or os.cpu_count() or 1
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as folder:
+        in_path = os.path.join(folder, "weights.txt")
+        with open(in_path, "w") as in_file:
+            in_file.writelines(f"{rng.uniform(0.1, 5000):.3f}\n" for _ in range(count))
+
+        print(f"---- parallel scaling ({count:,} lines, up to {max_workers} workers) ----")
+        single = None
+        for workers in range(1, max_workers + 1):
+            out_path = os.path.join(folder, "answers.txt")
+            start = time.perf_counter()
+            with open(out_path, "wb") as out_file:
+                if workers == 1:
+                    with open(in_path, "rb") as in_file:
+                        weight_cli.convert_stream(in_file, out_file, "g", "oz")
+                else:
+                    weight_cli.convert_parallel(in_path, out_file, "g", "oz", workers,
+                                                out_dir=folder)
+            taken = time.perf_counter() - start
+            single = single or taken
+            print(f"{workers:>2} worker(s) : {count / taken:>14,.0f} values/sec  "
+                  f"({single / taken:.2f}x)")
+
+
+def import_time(module, repeat=5):
+    """Best time (seconds) for a fresh interpreter to import a module."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = f"import {module}" if module else "pass"
+    return time_it(subprocess.run, [sys.executable, "-c", code], repeat=repeat,
+                   cwd=here, check=True)
+
+
+STARTUP_BUDGET_MS = 500  # longest cold start (launch to first frame) allowed
+# Tk's errors when there is no display to open a window on
+NO_DISPLAY_ERRORS = ("no display name", "couldn't connect to display")
+
+
+def slowest_imports(module, how_many=10):
+    """
+    Runs 'python -X importtime' for a module
+    :return: List of (cumulative microseconds, module name), slowest first
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=here, capture_output=True, text=True, check=True)
+
+    timings = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            timings.append((int(parts[1]), parts[2].rstrip()))
+    return sorted(timings, reverse=True)[:how_many]
+
+
+def bench_startup(budget_ms=STARTUP_BUDGET_MS, repeat=5):
+    """
+    Times a cold start of the GUI (launch to first frame)
+    :param budget_ms: Longest start-up allowed, in milliseconds
+    :return: False if start-up took longer than the budget
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    print("---- startup: slowest imports (python -X importtime, cumulative) ----")
+    for cumulative, name in slowest_imports("Weight_Converter_V2"):
+        print(f"{cumulative / 1000:>8.1f} ms {name}")
+
+    best = None
+    report = ""
+    for _ in range(repeat):
+        launched = time.time()
+        run = subprocess.run([sys.executable, "Weight_Converter_V2.py", "--time-startup"],
+                             cwd=here, capture_output=True, text=True)
+        if run.returncode != 0 and any(error in run.stderr for error in NO_DISPLAY_ERRORS):
+            best = None
+            break
+        if run.returncode != 0 or "first frame at" not in run.stderr:
+            # the GUI itself is broken - don't hide that behind the import time
+            print(f"---- startup: FAILED (exit code {run.returncode}) ----")
+            print(run.stderr.strip() or "no start-up report")
+            return False
+        report = run.stderr.strip().splitlines()[-1]
+        first_frame = float(report.rsplit("first frame at ", 1)[1].rstrip(")"))
+        taken = first_frame - launched
+        best = taken if best is None else min(best, taken)
+
+    if best is None:
+        # no display here - the imports are all that can be timed
+        best = import_time("Weight_Converter_V2", repeat)
+        print(f"---- startup: no display, timing a cold import instead (budget {budget_ms:g} ms) ----")
+        print(f"cold import   : {best * 1000:>10.1f} ms")
+    else:
+        print(f"---- startup: launch to first frame (best of {repeat}, budget {budget_ms:g} ms) ----")
+        print(report)
+        print(f"first frame   : {best * 1000:>10.1f} ms")
+
+    if best * 1000 > budget_ms:
+        print(f"OVER BUDGET by {best * 1000 - budget_ms:.1f} ms")
+        return False
+    return True
+
+
+def bench_imports():
+    """Compare importing the headless core with importing the Tk GUI module."""
+    start_up = import_time(None)
+    print("---- import time (fresh interpreter, start-up removed) ----")
+    for module in ("weight_core", "Weight_Converter_V2"):
+        taken = import_time(module) - start_up
+        print(f"{module:<20}: {taken * 1000:>10.1f} ms")
+
+
+def bench_history_memory(count=1_000_000):
+    """Compare the memory used by the columnar history and a list of strings."""
+    import tracemalloc
+    from history_store import CalculationHistory, render_calculation
+
+    rng = random.Random(42)
+    values = [round(rng.uniform(0.1, 5000), 2) for _ in range(count)]
+    answers = [cr.to_ounces_value(val) for val in values]
+
+    tracemalloc.start()
+    old_style = [render_calculation(val, "g", "oz", ans) for val, ans in zip(values, answers)]
+    list_bytes = tracemalloc.get_traced_memory()[0]
+    del old_style
+
+    tracemalloc.reset_peak()
+    start = tracemalloc.get_traced_memory()[0]
+    history = CalculationHistory()
+    for val, ans in zip(values, answers):
+        history.append(val, "g", "oz", ans)
+    history_bytes = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+
+    print(f"---- history memory ({count:,} entries) ----")
+    print(f"list of strings    : {list_bytes / 1e6:>10.1f} MB "
+          f"({list_bytes / count:.0f} bytes / entry)")
+    print(f"columnar history   : {history_bytes / 1e6:>10.1f} MB "
+          f"({history_bytes / count:.0f} bytes / entry)")
+
+
+def bench_history_filter(count=1_000_000):
+    """Time building the history index and running range queries on it."""
+    from history_index import HistoryIndex
+    from history_store import CalculationHistory
+
+    rng = random.Random(42)
+    history = CalculationHistory()
+    for _ in range(count):
+        val = round(rng.uniform(0.1, 5000), 2)
+        history.append(val, "g", "oz", cr.to_ounces_value(val))
+
+    start = time.perf_counter()
+    index = HistoryIndex(history)
+    index.update()
+    build_time = time.perf_counter() - start
+
+    query_time = time_it(index.query, "g", 1000, 1010, repeat=20)
+    history.append(1005.0, "g", "oz", cr.to_ounces_value(1005.0))
+    append_time = time_it(index.query, "g", 1000, 1010, repeat=1)
+    matches = len(index.query("g", 1000, 1010))
+
+    print(f"---- history filter ({count:,} entries, {matches:,} matches) ----")
+    print(f"build index   : {build_time * 1000:>14.1f} ms")
+    print(f"range query   : {query_time * 1e6:>14.1f} us")
+    print(f"after append  : {append_time * 1e6:>14.1f} us")
+
+
+def bench_dialog_open(repeat=20):
+    """Time opening the Help and History windows: rebuilt every time vs reused."""
+    import tkinter
+
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError as error:
+        print(f"---- dialog open latency skipped (no display: {error}) ----")
+        return
+    root.withdraw()
+
+    import Weight_Converter_V2 as gui
+    converter = gui.Converter()
+    for val in range(1, 101):
+        converter.core.convert("g", "oz", float(val))
+
+    def open_window(to_window):
+        start = time.perf_counter()
+        to_window()
+        root.update()
+        return time.perf_counter() - start
+
+    print(f"---- dialog open latency (best of {repeat}) ----")
+    for name, to_window, attribute, box, close in [
+            ("help", converter.to_help, "help_window", "help_box",
+             lambda window: window.close_help(converter)),
+            ("history", converter.to_history, "history_window", "history_box",
+             lambda window: window.close_history(converter, converter.core))]:
+        # the old way - build a new window every time it is opened
+        rebuilt = []
+        for _ in range(repeat):
+            rebuilt.append(open_window(to_window))
+            window = getattr(converter, attribute)
+            close(window)
+            getattr(window, box).destroy()
+            setattr(converter, attribute, None)
+
+        # build once, then hide and show
+        reused = []
+        for _ in range(repeat):
+            reused.append(open_window(to_window))
+            close(getattr(converter, attribute))
+
+        print(f"{name:<8} rebuilt : {min(rebuilt) * 1000:>8.2f} ms")
+        print(f"{name:<8} reused  : {min(reused[1:]) * 1000:>8.2f} ms "
+              f"(first open {reused[0] * 1000:.2f} ms)")
+
+    converter.close(root)
+
+
+SUITE_HISTORY_SIZES = (10, 1_000, 1_000_000)
+SUITE_EXPORT_SIZES = (1_000, 100_000, 1_000_000)
+
+
+def size_label(size):
+    """Short label for a case size, eg: 1000 -> '1k'."""
+    if size >= 1_000_000:
+        return f"{size // 1_000_000}m"
+    if size >= 1_000:
+        return f"{size // 1_000}k"
+    return str(size)
+
+
+def suite_cases(folder):
+    """
+    Builds the suite's timed cases
+    :param folder: Folder the export cases can write to
+    :return: List of (case name, function, arguments)
+    """
+    import all_constants as c
+    from history_export import export_calculations_to_txt
+    from history_store import CalculationHistory
+    from weight_core import build_calculation_string
+
+    rng = random.Random(42)
+    largest = max(SUITE_HISTORY_SIZES + SUITE_EXPORT_SIZES)
+    values = array("d", (round(rng.uniform(0.1, 5000), 2) for _ in range(largest)))
+
+    cases = [
+        ("convert-scalar", cr.convert_value, (values[0], "g", "oz")),
+        ("convert-batch-1k", cr.convert_batch, (values[:1_000], "g", "oz")),
+        ("convert-batch-1m", cr.convert_batch, (values, "g", "oz")),
+    ]
+
+    def make_history(size):
+        history = CalculationHistory()
+        for val in values[:size]:
+            history.append(val, "g", "oz", cr.to_ounces_value(val))
+        return history
+
+    full_history = make_history(len(values))
+    for size in SUITE_HISTORY_SIZES:
+        label = size_label(size)
+        history = full_history if size == len(values) else make_history(size)
+        cases.append((f"history-render-{label}", build_calculation_string,
+                      (history, c.MAX_CALCS)))
+        cases.append((f"history-render-list-{label}", build_calculation_string,
+                      (list(history), c.MAX_CALCS)))
+
+    for size in SUITE_EXPORT_SIZES:
+        cases.append((f"export-{size_label(size)}", export_calculations_to_txt,
+                      (os.path.join(folder, f"export_{size}"), full_history, date.today(), size)))
+    return cases
+
+
+def run_suite():
+    """Time every suite case, return {case name: seconds per call}."""
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for name, func, args in suite_cases(folder):
+            results[name] = time_per_call(func, *args, repeat=3)
+    return results
+
+
+def compare_results(baseline, results, threshold):
+    """
+    Prints how each case compares with a saved baseline
+    :param threshold: Percent slower than the baseline that counts as a regression
+    :return: Names of the cases that regressed
+    """
+    regressed = []
+    print(f"{'case':<26}{'baseline':>12}{'now':>12}{'change':>10}")
+    for name, taken in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<26}{'-':>12}{taken * 1e6:>10.1f}us{'new':>10}")
+            continue
+
+        change = (taken / before - 1) * 100
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        print(f"{name:<26}{before * 1e6:>10.1f}us{taken * 1e6:>10.1f}us{change:>+9.1f}%{flag}")
+    return regressed
+
+
+def bench_suite(save=None, compare=None, threshold=10.0):
+    """
+    Times the conversion, history rendering and export paths
+    :param save: JSON file to save the results in (as a baseline)
+    :param compare: JSON baseline to compare the results with
+    :param threshold: Percent slower than the baseline that counts as a regression
+    :return: False if anything regressed, otherwise True
+    """
+    print("---- benchmark suite (seconds per call, best of 3) ----")
+    results = run_suite()
+
+    if compare:
+        with open(compare) as json_file:
+            baseline = json.load(json_file)["results"]
+        regressed = compare_results(baseline, results, threshold)
+        if regressed:
+            print(f"{len(regressed)} case(s) more than {threshold:g}% slower than {compare}")
+    else:
+        regressed = []
+        for name, taken in results.items():
+            print(f"{name:<26}{taken * 1e6:>12.1f} us")
+
+    if save:
+        with open(save, "w") as json_file:
+            json.dump({"created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                       "python": platform.python_version(),
+                       "machine": platform.platform(),
+                       "numpy": cr.np is not None,
+                       "results": results}, json_file, indent=2)
+        print(f"saved baseline to {save}")
+
+    return not regressed
+
+
+BENCHMARKS = {
+    "batch": lambda args: bench_batch_conversion(args.count),
+    "registry": lambda args: bench_unit_registry(),
+    "parallel": lambda args: bench_parallel_scaling(args.count, args.workers),
+    "imports": lambda args: bench_imports(),
+    "history-memory": lambda args: bench_history_memory(args.count),
+    "history-filter": lambda args: bench_history_filter(args.count),
+    "dialogs": lambda args: bench_dialog_open(),
+    "startup": lambda args: bench_startup(args.budget_ms),
+    "suite": lambda args: bench_suite(args.save, args.compare, args.threshold),
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Weight converter benchmarks")
+    parser.add_argument("benchmarks", nargs="*",
+                        help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--count", type=int, default=1_000_000,
+                        help="number of values to convert")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="most worker processes for the parallel benchmark")
+    parser.add_argument("--save", metavar="FILE",
+                        help="save the suite's results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE",
+                        help="compare the suite's results with a saved JSON baseline")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="percent slower than the baseline that counts as a regression")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS,
+                        help="longest start-up allowed by the startup benchmark")
+    args = parser.parse_args()
+
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    passed = True
+    for name in args.benchmarks or BENCHMARKS:
+        if BENCHMARKS[name](args) is False:
+            passed = False
+
+    sys.exit(0 if passed else 1)
@@ -1,10 +1,124 @@
+import mmap
+from array import array
+
+import units
+
+# untyped buffers whose bytes are read as packed float64 values
+RAW_BUFFERS = (bytes, bytearray, mmap.mmap)
+
+
+# ---------- Optional NumPy ----------
+
+def load_numpy():
+    """
+    NumPy is optional (the batch helpers fall back to array('d')) and slow to
+    import, so it is only imported the first time something needs it
+    :return: The numpy module, or None if it isn't installed
+    """
+    global np
+    if "np" not in globals():
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+    return np
+
+
+def __getattr__(name):
+    # other modules read 'conversion_rounding.np' - import NumPy the first time they do
+    if name == "np":
+        return load_numpy()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def round_value(val):
+    """
+    Rounds temperature or weight to 1 decimal place
+    :param val: Number to be rounded
+    :return: Number rounded to 1 decimal place as a float
+    """
+    return round(val, 1)
+
+
+def format_ans(val):
+    """
+    Formats an already rounded answer for display / export
+    :param val: Number to be formatted
+    :return: Number with 1 decimal place as a string
+    """
+    return "{:.1f}".format(val)
+
+
 def round_ans(val):
     """
     Rounds temperature or weight to 1 decimal place
     :param val: Number to be rounded
     :return: Number rounded to 1 decimal place as a string
     """
-    return "{:.1f}".format(round(val, 1))
+    return format_ans(round_value(val))
+
+
+def convert_value(to_convert, from_unit, to_unit):
+    """
+    Converts a weight or temperature between any two units in the registry
+    :param to_convert: Value to be converted
+    :param from_unit: Unit code of the value (eg: 'g' or 'c')
+    :param to_unit: Unit code to convert to (eg: 'oz' or 'f')
+    :return: Converted value as a float (rounded to 1 dp)
+    """
+    scale, offset = units.affine(from_unit, to_unit)
+    return round_value(to_convert * scale + offset)
+
+
+def is_valid(to_convert, unit):
+    """
+    Checks a value is not below the lower bound for its unit
+    :param to_convert: Value to be checked
+    :param unit: Unit code of the value
+    :return: True if the value can be converted
+    """
+    return to_convert >= units.lower_bound(unit)
+
+
+def parse_value(to_convert, unit):
+    """
+    Checks input the same way the converter window does
+    :param to_convert: Text (or number) to be converted
+    :param unit: Unit code of the value
+    :return: The value as a float
+    :raises ValueError: With the error message to show the user
+    """
+    error = f"Enter a number more than / equal to {units.lower_bound(unit)}"
+    # float(True) is 1.0, but a yes / no answer isn't a weight (eg: JSON true)
+    if isinstance(to_convert, bool):
+        raise ValueError(error)
+    try:
+        value = float(to_convert.strip() if isinstance(to_convert, str) else to_convert)
+    except (TypeError, ValueError):
+        raise ValueError(error) from None
+
+    if not is_valid(value, unit):
+        raise ValueError(error)
+    return value
+
+
+def to_grams_value(to_convert):
+    """
+    Converts from Oz to G
+    :param to_convert: Weight to be converted in Oz
+    :return: Converted Weight in G as a float (rounded to 1 dp)
+    """
+    return convert_value(to_convert, "oz", "g")
+
+
+def to_ounces_value(to_convert):
+    """
+    Converts from G to Oz
+    :param to_convert: Weight to be converted in G
+    :return: Converted Weight in Oz as a float (rounded to 1 dp)
+    """
+    return convert_value(to_convert, "g", "oz")
 
 
 def to_grams(to_convert):
@@ -13,9 +127,7 @@ def to_grams(to_convert):
     :param to_convert: Weight to be converted in Oz
     :return: Converted Weight in G
     """
-    answer = (to_convert * 28.35)
-
-    return round_ans(answer)
+    return format_ans(to_grams_value(to_convert))
 
 
 def to_ounces(to_convert):
@@ -24,9 +136,149 @@ def to_ounces(to_convert):
     :param to_convert: Weight to be converted in G
     :return: Converted Weight in Oz
     """
-    answer = (to_convert / 28.35)
+    return format_ans(to_ounces_value(to_convert))
 
-    return round_ans(answer)
+
+def to_fahrenheit(to_convert):
+    """
+    Converts from °C to °F
+    :param to_convert: Temperature to be converted in °C
+    :return: Converted temperature in °F
+    """
+    return format_ans(convert_value(to_convert, "c", "f"))
+
+
+def to_celsius(to_convert):
+    """
+    Converts from °F to °C
+    :param to_convert: Temperature to be converted in °F
+    :return: Converted temperature in °C
+    """
+    return format_ans(convert_value(to_convert, "f", "c"))
+
+
+# ---------- Batch conversions ----------
+
+def as_float64(values):
+    """
+    Turns a batch of weights into float64 values without copying where possible
+    :param values: NumPy array, array.array or any other buffer (converted from its own
+                   type), raw float64 bytes (bytes / bytearray / mmap) or any sequence
+    :return: NumPy float64 array (or a 1-D array('d') / memoryview without NumPy)
+    """
+    np = load_numpy()
+
+    # raw bytes (eg: read straight from a file) have no type, so are packed doubles
+    if isinstance(values, RAW_BUFFERS):
+        if np is not None:
+            return np.frombuffer(values, dtype=np.float64)
+        return memoryview(values).cast("d")
+
+    if np is not None:
+        return np.asarray(values, dtype=np.float64)
+
+    try:
+        view = memoryview(values)
+    except TypeError:
+        return array("d", values)
+
+    if view.ndim != 1:
+        view = view.cast("B").cast(view.format)
+    if view.format == "d":
+        return view
+    return array("d", view)
+
+
+def round_batch(values):
+    """
+    Rounds a float64 batch to 1 decimal place, matching round_value exactly
+    :param values: float64 values to be rounded
+    :return: Rounded values as a float64 array
+    """
+    np = load_numpy()
+    if np is None:
+        return array("d", [round_value(val) for val in values])
+
+    scaled = values * 10.0
+    rounded = np.rint(scaled)
+    rounded /= 10.0
+
+    # np.rint only disagrees with round() when the scaled value sits on a
+    # .5 tie or is too big to hold a decimal place, so re-round those one by one
+    with np.errstate(invalid="ignore"):
+        distance_from_tie = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5)
+        suspect = (distance_from_tie < 1e-6) | (np.abs(scaled) >= 2.0 ** 30)
+
+    # flat positions, so batches with more than one dimension work too
+    for pos in np.flatnonzero(suspect):
+        rounded.flat[pos] = round_value(float(values.flat[pos]))
+
+    return rounded
+
+
+def convert_batch(to_convert, from_unit, to_unit):
+    """
+    Converts a batch of weights or temperatures between any two units in the registry
+    :param to_convert: Values to be converted (array / buffer / sequence)
+    :param from_unit: Unit code of the values (eg: 'g' or 'c')
+    :param to_unit: Unit code to convert to (eg: 'oz' or 'f')
+    :return: Converted values as a float64 array, rounded like convert_value
+    """
+    values = as_float64(to_convert)
+    scale, offset = units.affine(from_unit, to_unit)
+    np = load_numpy()
+    if np is None:
+        return array("d", [round_value(val * scale + offset) for val in values])
+
+    # huge values overflow to inf, which callers check for - don't warn on stderr
+    with np.errstate(over="ignore"):
+        answers = values * scale
+        answers += offset
+        return round_batch(answers)
+
+
+def valid_batch(to_convert, unit):
+    """
+    Checks a batch of values against the lower bound for their unit
+    :param to_convert: Values to be checked (array / buffer / sequence)
+    :param unit: Unit code of the values
+    :return: Boolean mask (NumPy array or list) - True where a value can be converted
+    """
+    values = as_float64(to_convert)
+    minimum = units.lower_bound(unit)
+    if load_numpy() is None:
+        return [val >= minimum for val in values]
+
+    return values >= minimum
+
+
+def format_batch(answers):
+    """
+    Formats a batch of rounded answers, one per line, for display / export
+    :param answers: Rounded values (array / sequence)
+    :return: String with each answer to 1 decimal place followed by a newline
+    """
+    answers = answers.tolist() if hasattr(answers, "tolist") else list(answers)
+    # one big % format is much quicker than formatting each answer separately
+    return ("%.1f\n" * len(answers)) % tuple(answers)
+
+
+def to_grams_batch(to_convert):
+    """
+    Converts a batch of weights from Oz to G
+    :param to_convert: Weights to be converted in Oz (array / buffer / sequence)
+    :return: Converted weights in G as a float64 array, rounded like to_grams_value
+    """
+    return convert_batch(to_convert, "oz", "g")
+
+
+def to_ounces_batch(to_convert):
+    """
+    Converts a batch of weights from G to Oz
+    :param to_convert: Weights to be converted in G (array / buffer / sequence)
+    :return: Converted weights in Oz as a float64 array, rounded like to_ounces_value
+    """
+    return convert_batch(to_convert, "g", "oz")
 
 # Main routine / Testing starts here
 # to_c_test = [0, 100, -459]
@@ -40,4 +292,4 @@ def to_ounces(to_convert):
 
 # for item in to_c_test:
 #    ans = to_celsius(item)
-#   print(f"{item} F is {ans} C")
\ No newline at end of file
+#   print(f"{item} F is {ans} C")
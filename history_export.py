@@ -0,0 +1,203 @@
+"""
+Exporting the calculation history to a text file.
+
+Repeated exports on the same day only append the calculations added since
+the last export. The file is rewritten from scratch when the day changes
+or when it no longer looks like the file we last wrote (its size or the
+hash of its last block has changed).
+
+The session statistics under the "Generated:" line are followed by a line
+of spaces that reserves room for them to grow, so an appending export can
+rewrite them in place. The file is only rewritten from scratch if they
+outgrow that room.
+"""
+
+import hashlib
+import os
+import queue
+import threading
+import time
+
+WRITE_BATCH = 8192  # calculations rendered and written per writelines call
+BUFFER_SIZE = 1024 * 1024  # bytes buffered before hitting the disk
+TAIL_SIZE = 4096  # bytes at the end of the file used to spot tampering
+STATS_ROOM = 512  # spare bytes left after the statistics for them to grow into
+
+
+def export_file_name(date_obj):
+    """Return the export file name (without .txt) for a given day."""
+    return f"weights_{date_obj.strftime('%Y_%m_%d')}"
+
+
+def write_calculations(text_file, calculations, start=0, end=None, progress=None):
+    """
+    Write calculations[start:end] to an open file, one big batch at a time
+    :param progress: Optional function called with (written so far, total) after each batch
+    """
+    end = len(calculations) if end is None else end
+    for batch_start in range(start, end, WRITE_BATCH):
+        batch_end = min(batch_start + WRITE_BATCH, end)
+        text_file.writelines([f"{item}\n" for item in calculations[batch_start:batch_end]])
+        if progress:
+            progress(batch_end - start, end - start)
+
+
+def stats_text(stats_lines):
+    """Return the statistics part of the header (see session_stats.py for the lines)."""
+    lines = stats_lines or ["No conversions yet this session"]
+    return "".join(f"{line}\n" for line in ["Statistics for this session's conversions:", *lines])
+
+
+def file_bytes(text_file, text):
+    """Return how many bytes 'text' takes up once written to an open text file."""
+    return len(text.replace("\n", os.linesep).encode(text_file.encoding))
+
+
+def pad_stats(text_file, text, size):
+    """
+    Add a line of spaces to the statistics so they take up exactly 'size' bytes
+    :return: The padded statistics, or None if they are already too big
+    """
+    spare = size - file_bytes(text_file, text + "\n")
+    return f"{text}{' ' * spare}\n" if spare >= 0 else None
+
+
+def export_calculations_to_txt(filename, calculations, date_obj, end=None, progress=None,
+                               stats_lines=()):
+    """
+    Write calculations (up to 'end') to a .txt file with header, date and statistics
+    :return: (file position of the statistics, bytes reserved for them)
+    """
+    day, month, year = date_obj.strftime("%d"), date_obj.strftime("%m"), date_obj.strftime("%Y")
+
+    with open(f"{filename}.txt", "w", buffering=BUFFER_SIZE) as text_file:
+        text_file.write("***** Weight Calculations ******\n")
+        text_file.write(f"Generated: {day}/{month}/{year}\n")
+        text = stats_text(stats_lines)
+        stats_size = file_bytes(text_file, text + "\n") + STATS_ROOM
+        stats_offset = text_file.tell()
+        text_file.write(pad_stats(text_file, text, stats_size))
+        text_file.write("Here is your calculation history (oldest to newest)...\n")
+        write_calculations(text_file, calculations, end=end, progress=progress)
+
+    return stats_offset, stats_size
+
+
+def file_tail_hash(path, size):
+    """Return a hash of the last TAIL_SIZE bytes of a file that is 'size' bytes long."""
+    with open(path, "rb") as check_file:
+        check_file.seek(max(size - TAIL_SIZE, 0))
+        return hashlib.sha1(check_file.read()).hexdigest()
+
+
+class IncrementalExporter:
+    """
+    Exports a history, appending only what is new since the last export
+    """
+
+    def __init__(self):
+        self.file_path = None
+        self.exported = 0  # high-water mark - calculations already in the file
+        self.size = 0
+        self.tail_hash = None
+
+        # the statistics in the file, where they are and the bytes reserved for them
+        self.stats_text = None
+        self.stats_offset = 0
+        self.stats_size = 0
+
+    def can_append(self, file_path):
+        """True if 'file_path' is still exactly the file we last wrote."""
+        if file_path != self.file_path or not os.path.exists(file_path):
+            return False
+
+        size = os.path.getsize(file_path)
+        return size == self.size and file_tail_hash(file_path, size) == self.tail_hash
+
+    def append(self, file_path, calculations, end, progress, text):
+        """
+        Rewrites the statistics in place and adds the new calculations to the file
+        :return: Bytes of statistics rewritten, or None if they no longer fit
+        """
+        with open(file_path, "r+", buffering=BUFFER_SIZE) as text_file:
+            rewritten = 0
+            if text != self.stats_text:
+                header = pad_stats(text_file, text, self.stats_size)
+                if header is None:
+                    return None
+                text_file.seek(self.stats_offset)
+                text_file.write(header)
+                rewritten = self.stats_size
+
+            text_file.seek(0, os.SEEK_END)
+            write_calculations(text_file, calculations, self.exported, end, progress)
+        return rewritten
+
+    def export(self, calculations, date_obj, progress=None, stats_lines=()):
+        """
+        Exports the history to the file for the given day
+        :param calculations: History to export (oldest first)
+        :param date_obj: Day to name the file after (and put in its header)
+        :param progress: Optional function called with (written so far, total)
+        :param stats_lines: This session's statistics lines for the header
+        :return: (file name, number of bytes written)
+        """
+        file_name = export_file_name(date_obj)
+        file_path = f"{file_name}.txt"
+
+        # calculations added while we are writing are left for the next export
+        end = len(calculations)
+        text = stats_text(stats_lines)
+
+        rewritten = None
+        if self.can_append(file_path) and self.exported <= end:
+            if end == self.exported and text == self.stats_text:
+                return file_path, 0
+            rewritten = self.append(file_path, calculations, end, progress, text)
+
+        if rewritten is None:
+            self.stats_offset, self.stats_size = export_calculations_to_txt(
+                file_name, calculations, date_obj, end, progress, stats_lines)
+            self.size = rewritten = 0
+
+        new_size = os.path.getsize(file_path)
+        written = new_size - self.size + rewritten
+
+        self.file_path = file_path
+        self.exported = end
+        self.stats_text = text
+        self.size = new_size
+        self.tail_hash = file_tail_hash(file_path, new_size)
+        return file_path, written
+
+
+class BackgroundExport:
+    """
+    Runs an export on a worker thread
+
+    Progress and the result are reported as tuples on a thread-safe queue:
+    ("progress", written so far, total), ("done", file name, bytes, seconds)
+    or ("error", message).
+    """
+
+    def __init__(self, exporter, calculations, date_obj, stats_lines=()):
+        self.messages = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True,
+                                       args=(exporter, calculations, date_obj, stats_lines))
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def run(self, exporter, calculations, date_obj, stats_lines):
+        start = time.perf_counter()
+        try:
+            file_name, written = exporter.export(
+                calculations, date_obj,
+                progress=lambda done, total: self.messages.put(("progress", done, total)),
+                stats_lines=stats_lines)
+        except Exception as error:
+            # any failure must reach the window, or it would wait for this export forever
+            self.messages.put(("error", str(error) or type(error).__name__))
+            return
+        self.messages.put(("done", file_name, written, time.perf_counter() - start))
@@ -0,0 +1,185 @@
+"""
+Sorted index over the calculation history for range filtering.
+
+Calculations are split into one partition per input unit, each holding
+the input values in sorted order (with the history position of each), so
+"every conversion of 500 g or more" is two bisects. The index catches up
+with new calculations when it is next queried, and query results are
+lazy views over the index rather than copies.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+
+import conversion_rounding as cr
+import units
+
+REBUILD_AT = 1000  # more new calculations than this are sorted in, not inserted one by one
+
+
+def typed_array(typecode, items):
+    """Return array(typecode) of items (copied as raw bytes if items is a NumPy array)."""
+    if hasattr(items, "dtype"):
+        made = array(typecode)
+        made.frombytes(items.tobytes())
+        return made
+    return array(typecode, items)
+
+
+def stable_argsort(values):
+    """
+    Same as NumPy's argsort(kind="stable"), but about twice as quick on big
+    arrays: an ordinary sort, then equal values are put back in their
+    original order by sorting unique (rank, original position) keys
+    """
+    np = cr.np
+    size = len(values)
+    order = np.argsort(values)
+    ordered = values[order]
+
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    ranks = np.repeat(np.arange(len(starts), dtype=np.uint64), np.diff(np.r_[starts, size]))
+    keys = ranks * np.uint64(size) + order.astype(np.uint64)
+    return (np.sort(keys) % np.uint64(size)).astype(np.int64)
+
+
+class Partition:
+    """
+    Input values of one unit in sorted order, with their history positions
+    """
+
+    def __init__(self):
+        self.values = array("d")
+        self.positions = array("q")
+
+    def insert(self, value, pos):
+        # positions only grow, so equal values stay in history order
+        spot = bisect_right(self.values, value)
+        self.values.insert(spot, value)
+        self.positions.insert(spot, pos)
+
+    def extend(self, new_values, new_positions, presorted=False):
+        """
+        Adds a lot of entries at once
+        :param new_values: Input values (array / sequence)
+        :param new_positions: History positions of the values
+        :param presorted: True if the new entries are already sorted by value
+        """
+        if presorted and not self.values:
+            self.values = typed_array("d", new_values)
+            self.positions = typed_array("q", new_positions)
+            return
+
+        values = self.values + typed_array("d", new_values)
+        positions = self.positions + typed_array("q", new_positions)
+
+        if cr.np is not None:
+            order = cr.np.argsort(cr.np.frombuffer(values, dtype=cr.np.float64), kind="stable")
+            self.values = array("d", cr.np.frombuffer(values, dtype=cr.np.float64)[order].tobytes())
+            self.positions = array("q", cr.np.frombuffer(positions, dtype=cr.np.int64)[order].tobytes())
+            return
+
+        pairs = sorted(zip(values, positions))
+        self.values = array("d", [pair[0] for pair in pairs])
+        self.positions = array("q", [pair[1] for pair in pairs])
+
+
+class HistoryIndex:
+    """
+    Per-unit sorted index of input values for a history
+    """
+
+    def __init__(self, history):
+        self.history = history
+        self.indexed = 0  # history entries already in the index
+        self.partitions = {}  # unit code -> Partition
+
+    def update(self):
+        """Brings the index up to date with the history."""
+        total = len(self.history)
+        if self.indexed >= total:
+            return
+
+        # read straight from the typed columns (no tuple per entry)
+        values, from_codes = self.history.input_columns(self.indexed, total)
+        if len(values) <= REBUILD_AT:
+            for pos, (value, code) in enumerate(zip(values, from_codes), start=self.indexed):
+                self.partitions.setdefault(units.UNIT_CODES[code], Partition()).insert(value, pos)
+        elif cr.np is not None:
+            self.extend_sorted(values, from_codes)
+        else:
+            grouped = {}
+            for pos, (value, code) in enumerate(zip(values, from_codes), start=self.indexed):
+                unit_values, positions = grouped.setdefault(code, ([], []))
+                unit_values.append(value)
+                positions.append(pos)
+            for code, (unit_values, positions) in grouped.items():
+                self.partitions.setdefault(units.UNIT_CODES[code], Partition()).extend(
+                    unit_values, positions)
+
+        self.indexed = total
+
+    def extend_sorted(self, values, from_codes):
+        """Groups a big batch by unit and sorts each group by value with NumPy."""
+        np = cr.np
+        values = np.frombuffer(values, dtype=np.float64)
+        codes = np.frombuffer(from_codes, dtype=np.uint8)
+
+        # a stable sort of small integer codes keeps each unit in history order
+        by_unit = np.argsort(codes, kind="stable")
+        codes = codes[by_unit]
+        bounds = [0, *(np.flatnonzero(codes[1:] != codes[:-1]) + 1).tolist(), len(codes)]
+
+        for start, stop in zip(bounds, bounds[1:]):
+            part = by_unit[start:stop]
+            # stable, so equal values stay in history order
+            part = part[stable_argsort(values[part])]
+            self.partitions.setdefault(units.UNIT_CODES[codes[start]], Partition()).extend(
+                values[part], part + self.indexed, presorted=True)
+
+    def query(self, from_unit, low=None, high=None):
+        """
+        Finds the conversions from a unit with an input value in a range
+        :param from_unit: Unit code of the input values
+        :param low: Smallest value wanted (None for no lower limit)
+        :param high: Largest value wanted (None for no upper limit)
+        :return: IndexView (sorted by value) - valid until the history grows
+        """
+        self.update()
+        partition = self.partitions.get(from_unit)
+        if partition is None:
+            return IndexView(self.history, array("q"), 0, 0)
+
+        start = 0 if low is None else bisect_left(partition.values, low)
+        stop = len(partition.values) if high is None else bisect_right(partition.values, high)
+        return IndexView(self.history, partition.positions, start, max(start, stop))
+
+
+class IndexView(Sequence):
+    """
+    Lazy, value-sorted view of part of a partition (items are calculation strings)
+    """
+
+    def __init__(self, history, positions, start, stop):
+        self.history = history
+        self.positions = positions
+        self.start = start
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def position(self, item):
+        """History position of item 'item' of the view."""
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("view index out of range")
+        return self.positions[self.start + item]
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self.history.render(self.position(pos))
+                    for pos in range(*item.indices(len(self)))]
+        return self.history.render(self.position(item))
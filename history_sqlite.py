@@ -0,0 +1,267 @@
+"""
+Persistent calculation history stored in SQLite.
+
+Works like history_store.CalculationHistory (same methods, and indexing
+gives calculation strings) but keeps every conversion on disk so it
+survives closing the program. The database runs in WAL mode and new rows
+are written in batched transactions instead of one commit per conversion.
+Indexes on the timestamp and units let the history window and exports ask
+for a day or a time range without loading everything.
+
+Row ids are handed out by the converter that has the file open, so the
+file is locked while it is open and a second converter can't use it.
+"""
+
+import sqlite3
+import threading
+import time
+from array import array
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+
+import all_constants as c
+from history_store import RingBuffer, render_calculation
+import units
+
+FLUSH_ROWS = 500  # write pending rows once this many have built up...
+FLUSH_SECONDS = 2.0  # ...or once the oldest has waited this long
+LOCK_WAIT = 0.5  # seconds to wait for a history file another converter has open
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calculations (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    value REAL NOT NULL,
+    from_unit TEXT NOT NULL,
+    to_unit TEXT NOT NULL,
+    answer REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calculations_ts ON calculations (ts);
+CREATE INDEX IF NOT EXISTS calculations_units_ts ON calculations (from_unit, to_unit, ts);
+"""
+
+
+def day_bounds(date_obj):
+    """Return (start, end) timestamps of a local calendar day."""
+    start = datetime(date_obj.year, date_obj.month, date_obj.day)
+    return start.timestamp(), (start + timedelta(days=1)).timestamp()
+
+
+class HistoryInUseError(RuntimeError):
+    """The history file is already open in another converter."""
+
+
+class SQLiteHistory(Sequence):
+    """
+    Calculation history kept in an SQLite database (oldest first)
+
+    Row ids are assigned here as position + 1, so looking up any position is
+    a primary key lookup. The file is locked (exclusively) until close().
+    """
+
+    def __init__(self, path, recent_size=c.MAX_CALCS):
+        self.path = path
+        # exports read from a worker thread, so share the connection behind a lock
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(path, timeout=LOCK_WAIT, check_same_thread=False)
+
+        # keep the file locked while we have it open - a second writer would
+        # hand out the same row ids as us
+        self.connection.execute("PRAGMA locking_mode=EXCLUSIVE")
+        try:
+            self.connection.execute("BEGIN EXCLUSIVE")
+            self.connection.execute("COMMIT")
+        except sqlite3.OperationalError:
+            self.connection.close()
+            raise HistoryInUseError(f"{path} is already open in another converter") from None
+
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+        self.saved = self.connection.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM calculations").fetchone()[0]
+        self.pending = []
+        self.oldest_pending = None
+
+        # seed the newest-first view with what is already on disk
+        self.recent = RingBuffer(recent_size)
+        for pos in range(max(self.saved - recent_size, 0), self.saved):
+            self.recent.append(self.render(pos))
+
+    # ---------- writing ----------
+
+    def append(self, value, from_unit, to_unit, answer):
+        """
+        Records a conversion (written to disk with the next batch)
+        :return: Position of the new entry
+        """
+        now = time.time()
+        with self.lock:
+            pos = self.saved + len(self.pending)
+            self.pending.append((pos + 1, now, value, from_unit, to_unit, answer))
+            self.recent.append(render_calculation(value, from_unit, to_unit, answer))
+
+            if self.oldest_pending is None:
+                self.oldest_pending = now
+            if len(self.pending) >= FLUSH_ROWS or now - self.oldest_pending >= FLUSH_SECONDS:
+                self.flush()
+        return pos
+
+    def flush(self):
+        """Writes any pending rows in one transaction."""
+        with self.lock:
+            if not self.pending:
+                return
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT INTO calculations VALUES (?, ?, ?, ?, ?, ?)", self.pending)
+            self.saved += len(self.pending)
+            self.pending = []
+            self.oldest_pending = None
+
+    def close(self):
+        """Writes any pending rows, then closes (and unlocks) the file."""
+        try:
+            self.flush()
+        finally:
+            with self.lock:
+                self.connection.close()
+
+    # ---------- reading ----------
+
+    # 'saved' and 'pending' are only read or changed while holding the lock,
+    # as exports read the history from a worker thread
+
+    def __len__(self):
+        with self.lock:
+            return self.saved + len(self.pending)
+
+    def record(self, pos):
+        """Return entry 'pos' as a (value, from unit, to unit, answer) tuple."""
+        with self.lock:
+            total = self.saved + len(self.pending)
+            if pos < 0:
+                pos += total
+            if not 0 <= pos < total:
+                raise IndexError("history index out of range")
+            if pos >= self.saved:
+                return self.pending[pos - self.saved][2:]
+
+            return self.connection.execute(
+                "SELECT value, from_unit, to_unit, answer FROM calculations WHERE id = ?",
+                (pos + 1,)).fetchone()
+
+    def render(self, pos):
+        """Return entry 'pos' as a calculation string."""
+        return render_calculation(*self.record(pos))
+
+    def records(self, start, stop):
+        """Return entries [start, stop) as (value, from unit, to unit, answer) tuples."""
+        # doesn't flush - this runs on the export thread, and flushing is left to the owner
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT value, from_unit, to_unit, answer FROM calculations "
+                "WHERE id > ? AND id <= ? ORDER BY id", (start, min(stop, self.saved))).fetchall()
+            if stop > self.saved:
+                rows += [row[2:] for row in
+                         self.pending[max(start - self.saved, 0):stop - self.saved]]
+            return rows
+
+    def input_columns(self, start, stop):
+        """Return (values, from unit indexes) of entries [start, stop) as typed arrays."""
+        values = array("d")
+        from_codes = array("B")
+        for value, from_unit, _, _ in self.records(start, stop):
+            values.append(value)
+            from_codes.append(units.UNIT_INDEX[from_unit])
+        return values, from_codes
+
+    def __getitem__(self, pos):
+        if not isinstance(pos, slice):
+            return self.render(pos)
+
+        start, stop, step = pos.indices(len(self))
+        if step != 1:
+            return [self.render(item) for item in range(start, stop, step)]
+
+        # one range query for a contiguous slice
+        return [render_calculation(*row) for row in self.records(start, stop)]
+
+    def newest(self, how_many):
+        """Newest entries first (served from the ring buffer where possible)."""
+        if how_many <= len(self.recent):
+            return self.recent.newest(how_many)
+
+        last = len(self)
+        return [self.render(pos) for pos in range(last - 1, max(last - how_many, 0) - 1, -1)]
+
+    def between(self, start_ts, end_ts, from_unit=None, to_unit=None):
+        """
+        Iterates over the conversions made in a time range (uses the indexes)
+        :param start_ts: Start of the range (unix timestamp, inclusive)
+        :param end_ts: End of the range (unix timestamp, exclusive)
+        :param from_unit: Only conversions from this unit (optional)
+        :param to_unit: Only conversions to this unit (optional, needs from_unit)
+        :return: Iterator of (timestamp, value, from unit, to unit, answer)
+        """
+        self.flush()
+        query = "SELECT ts, value, from_unit, to_unit, answer FROM calculations WHERE "
+        params = []
+        if from_unit is not None:
+            query += "from_unit = ? AND "
+            params.append(from_unit)
+            if to_unit is not None:
+                query += "to_unit = ? AND "
+                params.append(to_unit)
+        query += "ts >= ? AND ts < ? ORDER BY ts"
+        params += [start_ts, end_ts]
+
+        # the lock is only held while talking to the database, not between rows
+        with self.lock:
+            cursor = self.connection.execute(query, params)
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(1000)
+            if not rows:
+                return
+            yield from rows
+
+    def for_day(self, date_obj):
+        """
+        The conversions made on one day
+        :return: Sequence of calculation strings (rows are only read when used)
+        """
+        self.flush()
+        start_ts, end_ts = day_bounds(date_obj)
+        with self.lock:
+            first, last = self.connection.execute(
+                "SELECT MIN(id), MAX(id) FROM calculations WHERE ts >= ? AND ts < ?",
+                (start_ts, end_ts)).fetchone()
+        if first is None:
+            return []
+        return HistoryRange(self, first - 1, last)
+
+
+class HistoryRange(Sequence):
+    """
+    Lazy view of positions [start, stop) of a history
+    """
+
+    def __init__(self, history, start, stop):
+        self.history = history
+        self.start = start
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            start, stop, step = pos.indices(len(self))
+            return self.history[self.start + start:self.start + stop:step]
+        if pos < 0:
+            pos += len(self)
+        if not 0 <= pos < len(self):
+            raise IndexError("history index out of range")
+        return self.history[self.start + pos]
@@ -0,0 +1,135 @@
+"""
+Compact calculation history for the weight converter.
+
+Each conversion is stored as numbers in typed columns (array module)
+instead of as a formatted string, which keeps long sessions small.
+Strings like '12.0G is 0.4Oz' are only rendered when something (the
+history window, an export) asks for them. The last few rendered strings
+are kept in a ring buffer so 'newest N' views don't depend on how long
+the history is.
+"""
+
+from array import array
+from collections.abc import Sequence
+
+import all_constants as c
+import conversion_rounding as cr
+import units
+
+
+def render_calculation(value, from_unit, to_unit, answer):
+    """Return the calculation string shown to users, eg: '12.0G is 0.4Oz'."""
+    return (f"{value}{units.UNIT_LABELS[from_unit]} is "
+            f"{cr.format_ans(answer)}{units.UNIT_LABELS[to_unit]}")
+
+
+class RingBuffer:
+    """
+    Fixed size buffer that keeps the most recent items (oldest are overwritten)
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = [None] * capacity
+        self.next_pos = 0
+        self.count = 0
+
+    def append(self, item):
+        if not self.capacity:
+            return
+        self.items[self.next_pos] = item
+        self.next_pos = (self.next_pos + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def newest(self, how_many):
+        """Return up to 'how_many' items, newest first."""
+        how_many = min(how_many, self.count)
+        return [self.items[(self.next_pos - step) % self.capacity]
+                for step in range(1, how_many + 1)]
+
+    def __len__(self):
+        return self.count
+
+
+class CalculationHistory(Sequence):
+    """
+    Columnar history of conversions (oldest first)
+
+    Indexing / iterating gives rendered calculation strings, so it can be
+    used anywhere the old list of strings was.
+    """
+
+    def __init__(self, recent_size=c.MAX_CALCS):
+        self.values = array("d")
+        self.from_codes = array("B")
+        self.to_codes = array("B")
+        self.answers = array("d")
+
+        # rendered strings for the newest few entries
+        self.recent = RingBuffer(recent_size)
+
+    def append(self, value, from_unit, to_unit, answer):
+        """
+        Records a conversion
+        :param value: Weight that was converted
+        :param from_unit: Unit code of the weight
+        :param to_unit: Unit code it was converted to
+        :param answer: Converted (rounded) weight
+        :return: Position of the new entry
+        """
+        self.values.append(value)
+        self.from_codes.append(units.UNIT_INDEX[from_unit])
+        self.to_codes.append(units.UNIT_INDEX[to_unit])
+        self.answers.append(answer)
+        self.recent.append(render_calculation(value, from_unit, to_unit, answer))
+        return len(self.values) - 1
+
+    def newest(self, how_many):
+        """
+        Newest entries first, without touching the rest of the history
+        :param how_many: Number of entries wanted
+        :return: List of calculation strings (newest first)
+        """
+        if how_many <= len(self.recent):
+            return self.recent.newest(how_many)
+
+        # asked for more than the ring holds - render just those from the columns
+        last = len(self)
+        return [self.render(pos) for pos in range(last - 1, max(last - how_many, 0) - 1, -1)]
+
+    def record(self, pos):
+        """Return entry 'pos' as a (value, from unit, to unit, answer) tuple."""
+        return (self.values[pos], units.UNIT_CODES[self.from_codes[pos]],
+                units.UNIT_CODES[self.to_codes[pos]], self.answers[pos])
+
+    def render(self, pos):
+        """Return entry 'pos' as a calculation string."""
+        return render_calculation(*self.record(pos))
+
+    def records(self, start, stop):
+        """Return entries [start, stop) as (value, from unit, to unit, answer) tuples."""
+        codes = units.UNIT_CODES
+        return list(zip(self.values[start:stop],
+                        [codes[code] for code in self.from_codes[start:stop]],
+                        [codes[code] for code in self.to_codes[start:stop]],
+                        self.answers[start:stop]))
+
+    def input_columns(self, start, stop):
+        """Return (values, from unit indexes) of entries [start, stop) as typed arrays."""
+        return self.values[start:stop], self.from_codes[start:stop]
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self.render(item) for item in range(*pos.indices(len(self)))]
+        return self.render(pos)
+
+    def __repr__(self):
+        return f"CalculationHistory({list(self)!r})"
+
+    def nbytes(self):
+        """Memory used by the column data (bytes)."""
+        return sum(column.itemsize * len(column) for column in
+                   (self.values, self.from_codes, self.to_codes, self.answers))
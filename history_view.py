@@ -0,0 +1,124 @@
+"""
+Virtualised, scrollable list of calculations for the History window.
+
+Only the rows on screen (plus a few either side) are ever rendered, no
+matter how long the history is, so scrolling through millions of
+calculations stays smooth and memory stays flat. Rows are shown newest
+first. The source can be any sequence of calculation strings that
+supports len() and slicing (CalculationHistory, SQLiteHistory...).
+"""
+
+from tkinter import *
+
+
+class HistoryListView:
+    """
+    Listbox + scrollbar that only holds the visible rows
+    """
+
+    def __init__(self, parent, source, rows=10, overscan=10, font=("Arial", 14)):
+        self.source = source
+        self.rows = rows
+        self.overscan = overscan
+
+        self.first = 0  # row at the top of the view (0 = newest calculation)
+        self.total = len(source)
+        self.cache = {}  # history position -> rendered row, for rows near the view
+
+        self.frame = Frame(parent)
+        self.listbox = Listbox(self.frame, height=rows, width=30, font=font,
+                               activestyle="none", exportselection=False,
+                               highlightthickness=0)
+        self.listbox.grid(row=0, column=0)
+        self.scrollbar = Scrollbar(self.frame, orient=VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        # wheel (Windows / Mac and Linux) and keyboard navigation
+        self.listbox.bind("<MouseWheel>",
+                          lambda event: self.scroll_by(-1 if event.delta > 0 else 1))
+        self.listbox.bind("<Button-4>", lambda event: self.scroll_by(-1))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll_by(1))
+        for key, move in [("<Up>", self.line_up), ("<Down>", self.line_down),
+                          ("<Prior>", self.page_up), ("<Next>", self.page_down),
+                          ("<Home>", self.to_start), ("<End>", self.to_end)]:
+            self.listbox.bind(key, lambda event, move=move: move() or "break")
+
+        self.draw()
+
+    # ---------- moving around (each is O(1) plus drawing the visible rows) ----------
+
+    def scroll_by(self, how_many):
+        self.first += how_many
+        self.draw()
+
+    def line_up(self):
+        self.scroll_by(-1)
+
+    def line_down(self):
+        self.scroll_by(1)
+
+    def page_up(self):
+        self.scroll_by(-self.rows)
+
+    def page_down(self):
+        self.scroll_by(self.rows)
+
+    def to_start(self):
+        """Jump to the newest calculation."""
+        self.first = 0
+        self.draw()
+
+    def to_end(self):
+        """Jump to the oldest calculation."""
+        self.first = self.total
+        self.draw()
+
+    def on_scrollbar(self, action, amount, what=None):
+        """Scrollbar callback ('moveto' fraction or 'scroll' n units / pages)."""
+        if action == "moveto":
+            self.first = int(float(amount) * self.total)
+            self.draw()
+        elif action == "scroll":
+            self.scroll_by(int(amount) * (self.rows if what == "pages" else 1))
+
+    # ---------- data ----------
+
+    def set_source(self, source, keep_position=False):
+        """Show a different sequence of calculations (eg: a filtered view)."""
+        self.source = source
+        self.total = len(source)
+        if not keep_position:
+            self.first = 0
+        self.cache = {}
+        self.draw()
+
+    def refresh(self):
+        """Call after the source has grown - newer rows appear at the top."""
+        total = len(self.source)
+        if self.first:
+            # keep looking at the same calculations if scrolled down
+            self.first += total - self.total
+        self.total = total
+        self.draw()
+
+    def draw(self):
+        total = self.total
+        self.first = max(0, min(self.first, total - self.rows))
+        last = min(self.first + self.rows, total)
+
+        # history positions for the rows on screen plus the overscan either side
+        # (row r is position total - 1 - r as the newest is shown first)
+        start = max(total - (last + self.overscan), 0)
+        stop = total - max(self.first - self.overscan, 0)
+        if any(pos not in self.cache for pos in range(total - last, total - self.first)):
+            self.cache = dict(zip(range(start, stop), self.source[start:stop]))
+        else:
+            self.cache = {pos: text for pos, text in self.cache.items() if start <= pos < stop}
+
+        self.listbox.delete(0, END)
+        self.listbox.insert(END, *[self.cache[total - 1 - row] for row in range(self.first, last)])
+
+        if total:
+            self.scrollbar.set(self.first / total, last / total)
+        else:
+            self.scrollbar.set(0, 1)
@@ -0,0 +1,128 @@
+"""
+Counters and latency histograms for the weight converter's hot paths.
+
+Nothing is measured unless an Instruments object is created and asked to
+instrument something: instrument() swaps an object's methods for timed
+wrappers on that one instance, so when it is switched off the normal
+methods run untouched and cost nothing extra.
+
+Histograms use fixed buckets (1us up to 10s), so recording a call is a
+bisect and two additions no matter how long the session runs. Everything
+can be written out as JSON at any time with dump(), or at exit.
+"""
+
+import atexit
+import json
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# upper edges of the latency buckets, in seconds (anything slower goes in the last one)
+BUCKET_EDGES = (1e-6, 2e-6, 5e-6, 1e-5, 2e-5, 5e-5, 1e-4, 2e-4, 5e-4,
+                1e-3, 2e-3, 5e-3, 1e-2, 2e-2, 5e-2, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0)
+
+
+def bucket_name(edge):
+    """Return a readable bucket label, eg: '<=50us'."""
+    if edge < 1e-3:
+        return f"<={edge * 1e6:g}us"
+    if edge < 1:
+        return f"<={edge * 1e3:g}ms"
+    return f"<={edge:g}s"
+
+
+class Histogram:
+    """
+    Call count, total, max and fixed-bucket counts of a latency
+    """
+
+    __slots__ = ("count", "total", "maximum", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.buckets = [0] * (len(BUCKET_EDGES) + 1)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+        self.buckets[bisect_left(BUCKET_EDGES, seconds)] += 1
+
+    def as_dict(self):
+        names = [bucket_name(edge) for edge in BUCKET_EDGES] + [f">{BUCKET_EDGES[-1]:g}s"]
+        return {
+            "count": self.count,
+            "total_s": self.total,
+            "mean_s": self.total / self.count if self.count else 0.0,
+            "max_s": self.maximum,
+            "buckets": {name: hits for name, hits in zip(names, self.buckets) if hits},
+        }
+
+
+class Instruments:
+    """
+    Named counters and latency histograms
+    """
+
+    def __init__(self, dump_path=None):
+        self.dump_path = dump_path
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.time()
+
+    def count(self, name, amount=1):
+        """Add to a counter."""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, seconds):
+        """Record one latency (in seconds)."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+    def timed(self, func, name):
+        """Return func wrapped so every call is recorded in the 'name' histogram."""
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe(name, time.perf_counter() - start)
+        return wrapper
+
+    def instrument(self, obj, methods):
+        """
+        Times some of an object's methods (only on that instance)
+        :param obj: Object whose methods should be timed
+        :param methods: Dictionary of method name -> histogram name
+        """
+        for method, name in methods.items():
+            setattr(obj, method, self.timed(getattr(obj, method), name))
+
+    def snapshot(self):
+        """Everything recorded so far, as a JSON-able dictionary."""
+        return {
+            "started": self.started,
+            "seconds": time.time() - self.started,
+            "counters": dict(self.counters),
+            "histograms": {name: histogram.as_dict()
+                           for name, histogram in sorted(self.histograms.items())},
+        }
+
+    def dump(self, path=None):
+        """
+        Writes the snapshot to a JSON file
+        :return: The file name
+        """
+        path = path or self.dump_path
+        with open(path, "w") as json_file:
+            json.dump(self.snapshot(), json_file, indent=2)
+        return path
+
+    def dump_at_exit(self):
+        atexit.register(self.dump)
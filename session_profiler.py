@@ -0,0 +1,87 @@
+"""
+Profiling for long converter sessions (cProfile + tracemalloc).
+
+The whole Tk session runs under cProfile, and a tracemalloc snapshot is
+taken every N conversions. When the session ends two files are written:
+
+    PREFIX.pstats            cProfile stats (open with pstats or snakeviz)
+    PREFIX_allocations.txt   memory after each snapshot, and the lines whose
+                             allocations grew most since the first snapshot
+
+so growth in the history or leaked windows / widgets can be tracked down.
+"""
+
+import cProfile
+import tracemalloc
+
+TOP_ALLOCATIONS = 25  # lines listed in the allocations report
+TRACE_FRAMES = 5  # stack depth recorded for each allocation
+
+
+class SessionProfiler:
+    """
+    Runs cProfile and takes tracemalloc snapshots every few conversions
+    """
+
+    def __init__(self, prefix, snapshot_every=100):
+        self.prefix = prefix
+        self.snapshot_every = snapshot_every
+        self.profile = cProfile.Profile()
+
+        self.conversions = 0
+        self.first_snapshot = None
+        self.last_snapshot = None
+        self.timeline = []  # (conversions, traced bytes, peak bytes)
+
+    def start(self):
+        tracemalloc.start(TRACE_FRAMES)
+        self.take_snapshot()
+        self.profile.enable()
+        return self
+
+    def on_conversion(self, core):
+        """Core listener - counts conversions and takes a snapshot every so often."""
+        self.conversions += 1
+        if self.conversions % self.snapshot_every == 0:
+            self.take_snapshot()
+
+    def take_snapshot(self):
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+        if self.first_snapshot is None:
+            self.first_snapshot = snapshot
+        self.last_snapshot = snapshot
+        self.timeline.append((self.conversions, *tracemalloc.get_traced_memory()))
+
+    def stop(self):
+        """
+        Stops profiling and writes the stats and allocation report
+        :return: (pstats file name, allocations file name)
+        """
+        self.profile.disable()
+        if self.timeline[-1][0] != self.conversions:
+            self.take_snapshot()
+        tracemalloc.stop()
+
+        stats_path = f"{self.prefix}.pstats"
+        self.profile.dump_stats(stats_path)
+
+        report_path = f"{self.prefix}_allocations.txt"
+        with open(report_path, "w") as report:
+            report.write(f"***** Memory after every {self.snapshot_every} conversions *****\n")
+            for conversions, traced, peak in self.timeline:
+                report.write(f"{conversions:>10,} conversions: {traced / 1e6:>9.2f} MB "
+                             f"(peak {peak / 1e6:.2f} MB)\n")
+
+            report.write(f"\n***** Top {TOP_ALLOCATIONS} allocation changes "
+                         f"since the start *****\n")
+            changes = self.last_snapshot.compare_to(self.first_snapshot, "traceback")
+            for change in changes[:TOP_ALLOCATIONS]:
+                report.write(f"\n{change.size_diff / 1024:+,.1f} KiB "
+                             f"({change.count_diff:+,} blocks, now {change.size / 1024:,.1f} KiB)\n")
+                for line in change.traceback.format(most_recent_first=True):
+                    report.write(f"{line}\n")
+
+        return stats_path, report_path
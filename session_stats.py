@@ -0,0 +1,79 @@
+"""
+Running statistics for the weights converted in a session.
+
+Count, sum, mean, variance, min and max are kept for each direction
+(eg: grams to ounces) and updated in constant time as each conversion
+happens, using Welford's online algorithm for the mean and variance, so
+nothing ever has to rescan the history.
+"""
+
+import math
+
+import units
+
+
+class RunningStats:
+    """
+    Count, sum, mean, variance, min and max of a stream of values
+    """
+
+    __slots__ = ("count", "total", "mean", "m2", "minimum", "maximum")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared differences from the mean
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def add(self, value):
+        """Include one more value (Welford's update)."""
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    @property
+    def variance(self):
+        """Sample variance (0 until there are two values)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+
+class SessionStats:
+    """
+    RunningStats for every direction converted so far
+    """
+
+    def __init__(self):
+        # (from unit, to unit) -> RunningStats, in the order first used
+        self.directions = {}
+
+    def add(self, from_unit, to_unit, value):
+        """
+        Records a converted weight
+        :param from_unit: Unit code of the weight
+        :param to_unit: Unit code it was converted to
+        :param value: Weight that was converted
+        """
+        stats = self.directions.get((from_unit, to_unit))
+        if stats is None:
+            stats = self.directions[from_unit, to_unit] = RunningStats()
+        stats.add(value)
+
+    def lines(self):
+        """Return one summary line per direction, eg: 'G to Oz: count 2, sum 30.0, ...'."""
+        summary = []
+        for (from_unit, to_unit), stats in self.directions.items():
+            label = units.UNIT_LABELS[from_unit]
+            summary.append(f"{label} to {units.UNIT_LABELS[to_unit]}: "
+                           f"count {stats.count:,}, sum {stats.total:,.1f}{label}, "
+                           f"mean {stats.mean:,.1f}{label}, variance {stats.variance:,.1f}, "
+                           f"min {stats.minimum:,.1f}{label}, max {stats.maximum:,.1f}{label}")
+        return summary
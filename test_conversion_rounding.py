@@ -0,0 +1,95 @@
+"""
+Checks for the scalar and batch conversions in conversion_rounding.
+
+Run with:  python -m pytest
+      or:  python -m unittest
+"""
+
+import random
+import unittest
+from array import array
+from unittest import mock
+
+import conversion_rounding as cr
+
+np = cr.load_numpy()  # optional, like in the converter itself
+
+
+def sample_weights(count=20_000):
+    """Random weights plus values that sit on (or next to) a rounding tie."""
+    rng = random.Random(7)
+    weights = [rng.uniform(0, 5000) for _ in range(count)]
+    weights += [round(rng.uniform(0, 5000), 2) for _ in range(count)]
+    weights += [0.0, 0.05, 0.15, 0.25, 2.25, 28.349523125, 1e10, 2.0 ** 30, 1e300]
+    return weights
+
+
+# ---------- Conversions ----------
+
+class ConversionTests(unittest.TestCase):
+
+    def check_batch_matches_scalar(self):
+        weights = sample_weights()
+        for from_unit, to_unit in (("g", "oz"), ("oz", "g"), ("c", "f"), ("f", "c")):
+            expected = [cr.convert_value(val, from_unit, to_unit) for val in weights]
+            answers = cr.convert_batch(weights, from_unit, to_unit)
+            # '==' on floats is exact, so this is a bit-for-bit comparison
+            self.assertEqual(list(answers), expected, f"{from_unit} to {to_unit}")
+
+    def test_batch_matches_scalar(self):
+        self.check_batch_matches_scalar()
+
+    def test_batch_matches_scalar_without_numpy(self):
+        with mock.patch.object(cr, "np", None):
+            self.assertIsNone(cr.load_numpy())
+            self.check_batch_matches_scalar()
+
+    def test_batch_accepts_buffers(self):
+        weights = [0.0, 12.5, 28.35, 1000.0]
+        expected = [cr.to_ounces_value(val) for val in weights]
+        for batch in (weights, array("d", weights), array("d", weights).tobytes()):
+            self.assertEqual(list(cr.to_ounces_batch(batch)), expected)
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_typed_buffers_convert_by_their_own_type(self):
+        expected = [cr.to_grams_value(val) for val in range(1, 9)]
+        for batch in (np.arange(1, 9, dtype=np.uint8), np.arange(1, 9, dtype=np.int32),
+                      array("b", range(1, 9)), memoryview(array("H", range(1, 9)))):
+            self.assertEqual(list(cr.to_grams_batch(batch)), expected, repr(batch))
+
+    def test_typed_buffers_without_numpy(self):
+        expected = [cr.to_grams_value(val) for val in range(1, 9)]
+        with mock.patch.object(cr, "np", None):
+            for batch in (array("b", range(1, 9)), array("d", range(1, 9)).tobytes(),
+                          bytearray(array("d", range(1, 9)).tobytes())):
+                self.assertEqual(list(cr.to_grams_batch(batch)), expected, repr(batch))
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_two_dimensional_batch(self):
+        # 2.25 sits on a rounding tie, so it is re-rounded one value at a time
+        weights = np.array([[1.0, 2.25], [3.0, 2.25]])
+        answers = cr.convert_batch(weights, "g", "g")
+        self.assertEqual(answers.shape, (2, 2))
+        self.assertEqual(answers.tolist(), [[1.0, 2.2], [3.0, 2.2]])
+        self.assertEqual(cr.to_grams_batch(weights).tolist(),
+                         [[cr.to_grams_value(val) for val in row] for row in weights.tolist()])
+
+    def test_format_batch(self):
+        self.assertEqual(cr.format_batch(cr.to_grams_batch([1, 2.5])), "28.4\n70.9\n")
+
+    def test_convert_value(self):
+        self.assertEqual(cr.to_ounces(28.349523125), "1.0")
+        self.assertEqual(cr.to_grams_value(1), 28.4)
+        self.assertEqual(cr.convert_value(100, "c", "f"), 212.0)
+
+    def test_parse_value(self):
+        self.assertEqual(cr.parse_value(" 12.5 ", "g"), 12.5)
+        self.assertEqual(cr.parse_value(0.01, "oz"), 0.01)
+        # below the lower bound for grams (0.1), or not a number (True is not 1.0g)
+        for bad in ("", "abc", "0.05", "-1", None, True):
+            with self.assertRaises(ValueError):
+                cr.parse_value(bad, "g")
+
+
+if __name__ == "__main__":
+    unittest.main()
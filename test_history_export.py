@@ -0,0 +1,226 @@
+"""
+Checks for the incremental (append only) history export.
+
+Run with:  python -m pytest
+      or:  python -m unittest
+"""
+
+import datetime
+import os
+import tempfile
+import unittest
+
+import conversion_rounding as cr
+from history_export import STATS_ROOM, IncrementalExporter, export_file_name
+from history_store import CalculationHistory
+from session_stats import SessionStats
+
+DAY = datetime.date(2026, 10, 18)
+
+
+def make_history(values, from_unit="g", to_unit="oz"):
+    history = CalculationHistory()
+    for value in values:
+        history.append(value, from_unit, to_unit, cr.convert_value(value, from_unit, to_unit))
+    return history
+
+
+class ExportTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # exports are written to the current folder
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(folder.name)
+
+    def read(self, file_path):
+        with open(file_path) as text_file:
+            return text_file.read()
+
+    def full_export(self, history, date_obj=DAY, **options):
+        """Return what a fresh (non-incremental) export of the history writes."""
+        file_path, _ = IncrementalExporter().export(history, date_obj, **options)
+        return self.read(file_path)
+
+
+class IncrementalExportTests(ExportTestCase):
+
+    def test_first_export(self):
+        file_path, written = IncrementalExporter().export(make_history([1.5, 2.0]), DAY)
+
+        self.assertEqual(file_path, "weights_2026_10_18.txt")
+        self.assertEqual(written, os.path.getsize(file_path))
+        text = self.read(file_path)
+        self.assertTrue(text.startswith("***** Weight Calculations ******\n"
+                                        "Generated: 18/10/2026\n"
+                                        "Statistics for this session's conversions:\n"
+                                        "No conversions yet this session\n"))
+        self.assertIn("(oldest to newest)...\n1.5G is 0.1Oz\n2.0G is 0.1Oz\n", text)
+
+    def test_append_matches_full_export(self):
+        history = make_history([1.5, 2.0, 3.25])
+        exporter = IncrementalExporter()
+        file_path, first_written = exporter.export(history, DAY)
+
+        for value in (7.0, 8.5):
+            history.append(value, "oz", "g", cr.to_grams_value(value))
+        _, written = exporter.export(history, DAY)
+        appended = self.read(file_path)
+
+        self.assertLess(written, first_written)
+        self.assertIn("8.5Oz is 241.0G\n", appended)
+        self.assertEqual(appended, self.full_export(history))
+
+    def test_nothing_new_writes_nothing(self):
+        history = make_history([1.0, 2.0])
+        exporter = IncrementalExporter()
+        file_path, _ = exporter.export(history, DAY)
+        before = self.read(file_path)
+
+        _, written = exporter.export(history, DAY)
+        self.assertEqual(written, 0)
+        self.assertEqual(self.read(file_path), before)
+
+    def test_tampered_file_is_rewritten(self):
+        history = make_history([1.0, 2.0, 3.0])
+        exporter = IncrementalExporter()
+        file_path, _ = exporter.export(history, DAY)
+
+        # same size, different contents - only the tail hash can spot it
+        text = self.read(file_path)
+        with open(file_path, "w") as text_file:
+            text_file.write(text.replace("1.0G", "9.0G"))
+
+        history.append(4.0, "g", "oz", cr.to_ounces_value(4.0))
+        exporter.export(history, DAY)
+        self.assertEqual(self.read(file_path), self.full_export(history))
+
+    def test_file_changed_size_is_rewritten(self):
+        history = make_history([1.0, 2.0])
+        exporter = IncrementalExporter()
+        file_path, _ = exporter.export(history, DAY)
+        with open(file_path, "a") as text_file:
+            text_file.write("a note of my own\n")
+
+        history.append(3.0, "g", "oz", cr.to_ounces_value(3.0))
+        exporter.export(history, DAY)
+        self.assertEqual(self.read(file_path), self.full_export(history))
+
+    def test_deleted_file_is_rewritten(self):
+        history = make_history([1.0, 2.0])
+        exporter = IncrementalExporter()
+        file_path, _ = exporter.export(history, DAY)
+        os.remove(file_path)
+
+        history.append(3.0, "g", "oz", cr.to_ounces_value(3.0))
+        exporter.export(history, DAY)
+        self.assertEqual(self.read(file_path), self.full_export(history))
+
+    def test_new_day_starts_a_new_file(self):
+        history = make_history([1.0])
+        exporter = IncrementalExporter()
+        exporter.export(history, DAY)
+
+        history.append(2.0, "g", "oz", cr.to_ounces_value(2.0))
+        next_day = DAY + datetime.timedelta(days=1)
+        file_path, _ = exporter.export(history, next_day)
+
+        self.assertEqual(file_path, f"{export_file_name(next_day)}.txt")
+        self.assertIn("Generated: 19/10/2026\n", self.read(file_path))
+        self.assertIn("1.0G is 0.0Oz\n2.0G is 0.1Oz\n", self.read(file_path))
+
+    def test_large_history_in_batches(self):
+        # more than one WRITE_BATCH, with the append starting mid batch
+        history = make_history(range(1, 10_001))
+        exporter = IncrementalExporter()
+        file_path, _ = exporter.export(history, DAY)
+        for value in range(10_001, 20_001):
+            history.append(value, "g", "oz", cr.to_ounces_value(value))
+
+        progress = []
+        exporter.export(history, DAY, progress=lambda done, total: progress.append((done, total)))
+
+        self.assertEqual(progress[-1], (10_000, 10_000))
+        self.assertEqual(self.read(file_path), self.full_export(history))
+
+
+class ExportStatisticsTests(ExportTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.history = CalculationHistory()
+        self.stats = SessionStats()
+
+    def convert(self, values, from_unit="g", to_unit="oz"):
+        """Add conversions to the history and the session statistics, like the window does."""
+        for value in values:
+            self.history.append(value, from_unit, to_unit,
+                                cr.convert_value(value, from_unit, to_unit))
+            self.stats.add(from_unit, to_unit, value)
+
+    def export(self, exporter):
+        return exporter.export(self.history, DAY, stats_lines=self.stats.lines())
+
+    def header(self, file_path):
+        """Return the file's lines between 'Generated:' and the calculations."""
+        lines = self.read(file_path).split("\n")
+        return lines[2:lines.index("Here is your calculation history (oldest to newest)...")]
+
+    def test_statistics_are_under_the_date(self):
+        self.convert([10.0, 20.0])
+        file_path, _ = self.export(IncrementalExporter())
+
+        header = self.header(file_path)
+        self.assertEqual(header[:2], ["Statistics for this session's conversions:",
+                                      self.stats.lines()[0]])
+        # the rest is the room left for them to grow
+        self.assertEqual(header[2].strip(), "")
+        self.assertGreaterEqual(len(header[2]), STATS_ROOM - 1)
+
+    def test_growing_statistics_are_rewritten_in_place(self):
+        self.convert([10.0, 20.0])
+        exporter = IncrementalExporter()
+        file_path, _ = self.export(exporter)
+        size = os.path.getsize(file_path)
+
+        # a new direction and longer numbers still fit in the room left for them
+        self.convert([123456.75], "oz", "g")
+        _, written = self.export(exporter)
+        row = f"{self.history[-1]}\n"
+
+        self.assertEqual(written, len(row) + exporter.stats_size)
+        self.assertEqual(os.path.getsize(file_path), size + len(row))
+        self.assertEqual(self.header(file_path)[1:3], self.stats.lines())
+        self.assertTrue(self.read(file_path).endswith(row))
+
+    def test_statistics_that_outgrow_their_room_rewrite_the_file(self):
+        self.convert([10.0])
+        exporter = IncrementalExporter()
+        file_path, _ = self.export(exporter)
+        reserved = exporter.stats_size
+
+        # each new direction adds a line of statistics
+        for from_unit, to_unit in (("kg", "g"), ("kg", "lb"), ("lb", "kg"), ("mg", "g"),
+                                   ("g", "kg"), ("lb", "oz"), ("oz", "lb"), ("st", "kg")):
+            self.convert([2.5], from_unit, to_unit)
+        _, written = self.export(exporter)
+
+        self.assertEqual(written, os.path.getsize(file_path))
+        self.assertGreater(exporter.stats_size, reserved)
+        self.assertEqual(self.header(file_path)[1:-1], self.stats.lines())
+        self.assertEqual(self.read(file_path), self.full_export(self.history,
+                                                                stats_lines=self.stats.lines()))
+
+    def test_nothing_new_leaves_the_file_alone(self):
+        self.convert([10.0])
+        exporter = IncrementalExporter()
+        file_path, _ = self.export(exporter)
+        tail_hash = exporter.tail_hash
+
+        self.assertEqual(self.export(exporter), (file_path, 0))
+        self.assertEqual(exporter.tail_hash, tail_hash)
+
+
+if __name__ == "__main__":
+    unittest.main()
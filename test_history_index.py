@@ -0,0 +1,113 @@
+"""
+Checks for the sorted filter index over the calculation history.
+
+Run with:  python -m pytest
+      or:  python -m unittest
+"""
+
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import conversion_rounding as cr
+from history_index import REBUILD_AT, HistoryIndex
+from history_sqlite import SQLiteHistory
+from history_store import CalculationHistory
+
+UNIT_PAIRS = (("g", "oz"), ("oz", "g"), ("kg", "lb"))
+
+
+def add_random(history, count, rng):
+    """Append 'count' random conversions, with plenty of repeated values."""
+    for _ in range(count):
+        from_unit, to_unit = rng.choice(UNIT_PAIRS)
+        if rng.random() < 0.5:
+            value = float(rng.randint(1, 200))
+        else:
+            value = round(rng.uniform(0.1, 500), 2)
+        history.append(value, from_unit, to_unit, cr.convert_value(value, from_unit, to_unit))
+
+
+def brute_force(history, from_unit, low=None, high=None):
+    """History positions a query should find: sorted by value, oldest first for ties."""
+    matches = []
+    for pos in range(len(history)):
+        value, unit, _, _ = history.record(pos)
+        if unit != from_unit or (low is not None and value < low):
+            continue
+        if high is None or value <= high:
+            matches.append((value, pos))
+    return [pos for _, pos in sorted(matches)]
+
+
+class HistoryIndexTests(unittest.TestCase):
+
+    def check_queries(self, history, index):
+        for from_unit in ("g", "oz", "kg", "mg"):
+            for low, high in ((None, None), (10.0, 50.0), (None, 100.0), (150.0, None),
+                              (42.0, 42.0), (50.0, 10.0)):
+                view = index.query(from_unit, low, high)
+                expected = brute_force(history, from_unit, low, high)
+                message = f"{from_unit} {low}..{high}"
+                self.assertEqual([view.position(item) for item in range(len(view))], expected,
+                                 message)
+                self.assertEqual(view[:3], [history.render(pos) for pos in expected[:3]],
+                                 message)
+
+    def test_small_additions_are_inserted(self):
+        rng = random.Random(1)
+        history = CalculationHistory()
+        index = HistoryIndex(history)
+        for _ in range(5):
+            add_random(history, 50, rng)
+            self.check_queries(history, index)
+
+    def test_large_additions_are_sorted_in(self):
+        rng = random.Random(2)
+        history = CalculationHistory()
+        index = HistoryIndex(history)
+        add_random(history, REBUILD_AT * 3, rng)
+        self.check_queries(history, index)
+
+        # a second big batch is merged with what the index already has
+        add_random(history, REBUILD_AT * 2, rng)
+        self.check_queries(history, index)
+
+    def test_without_numpy(self):
+        rng = random.Random(3)
+        history = CalculationHistory()
+        with mock.patch.object(cr, "np", None):
+            index = HistoryIndex(history)
+            add_random(history, REBUILD_AT + 500, rng)
+            self.check_queries(history, index)
+            add_random(history, 20, rng)
+            self.check_queries(history, index)
+
+    def test_sqlite_history(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        history = SQLiteHistory(os.path.join(folder.name, "history.db"))
+        self.addCleanup(history.close)
+
+        rng = random.Random(4)
+        add_random(history, REBUILD_AT + 200, rng)
+        index = HistoryIndex(history)
+        self.check_queries(history, index)
+
+    def test_view_items(self):
+        history = CalculationHistory()
+        for value in (30.0, 10.0, 20.0, 10.0):
+            history.append(value, "g", "oz", cr.to_ounces_value(value))
+
+        view = HistoryIndex(history).query("g", 10.0, 20.0)
+        self.assertEqual(len(view), 3)
+        self.assertEqual([view.position(item) for item in range(3)], [1, 3, 2])
+        self.assertEqual(view[-1], "20.0G is 0.7Oz")
+        with self.assertRaises(IndexError):
+            view[3]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+Checks for the SQLite-backed persistent history.
+
+Run with:  python -m pytest
+      or:  python -m unittest
+"""
+
+import datetime
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+
+import conversion_rounding as cr
+from history_export import IncrementalExporter
+from history_sqlite import HistoryInUseError, SQLiteHistory
+
+
+class ConnectionWrapper:
+    """Passes everything on to a real connection (tests change bits of it)."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+    def __enter__(self):
+        return self.connection.__enter__()
+
+    def __exit__(self, *details):
+        return self.connection.__exit__(*details)
+
+
+class SQLiteHistoryTests(unittest.TestCase):
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.path = os.path.join(folder.name, "history.db")
+
+    def open_history(self):
+        history = SQLiteHistory(self.path)
+        self.addCleanup(history.close)
+        return history
+
+    def append_weights(self, history, values):
+        for value in values:
+            history.append(value, "g", "oz", cr.to_ounces_value(value))
+
+    def test_survives_reopening(self):
+        history = self.open_history()
+        self.append_weights(history, [1.0, 2.0, 3.0])
+        history.close()
+
+        reopened = self.open_history()
+        self.assertEqual(len(reopened), 3)
+        self.assertEqual(reopened[:], ["1.0G is 0.0Oz", "2.0G is 0.1Oz", "3.0G is 0.1Oz"])
+        self.assertEqual(reopened.newest(1), ["3.0G is 0.1Oz"])
+
+    def test_records_span_saved_and_pending_rows(self):
+        history = self.open_history()
+        self.append_weights(history, [1.0, 2.0])
+        history.flush()
+        self.append_weights(history, [3.0, 4.0])
+
+        self.assertEqual([row[0] for row in history.records(1, 4)], [2.0, 3.0, 4.0])
+        self.assertEqual(history[1:3], ["2.0G is 0.1Oz", "3.0G is 0.1Oz"])
+        self.assertEqual(history[-1], "4.0G is 0.1Oz")
+
+    def test_day_and_range_queries(self):
+        history = self.open_history()
+        self.append_weights(history, [1.0, 2.0])
+        history.append(3.0, "oz", "g", cr.to_grams_value(3.0))
+        now = time.time()
+
+        self.assertEqual(list(history.for_day(datetime.date.today())),
+                         ["1.0G is 0.0Oz", "2.0G is 0.1Oz", "3.0Oz is 85.1G"])
+        self.assertEqual(history.for_day(datetime.date.today() - datetime.timedelta(days=1)), [])
+        self.assertEqual([row[1:] for row in history.between(now - 60, now + 60, "oz")],
+                         [(3.0, "oz", "g", 85.1)])
+
+    def test_export_of_the_day(self):
+        history = self.open_history()
+        self.append_weights(history, [1.0, 2.0])
+        today = datetime.date.today()
+
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.folder)
+        file_path, _ = IncrementalExporter().export(history.for_day(today), today)
+        with open(file_path) as text_file:
+            self.assertIn("1.0G is 0.0Oz\n2.0G is 0.1Oz\n", text_file.read())
+
+    def test_append_during_a_flush_is_kept(self):
+        history = self.open_history()
+        self.append_weights(history, [1.0])
+        committing = threading.Event()
+
+        class SlowCommit(ConnectionWrapper):
+            """Connection that pauses while committing a batch."""
+
+            def __exit__(self, *details):
+                committing.set()
+                time.sleep(0.2)  # time for the main thread's append to happen
+                return self.connection.__exit__(*details)
+
+        # an export thread flushes while the main thread carries on converting
+        connection = history.connection
+        history.connection = SlowCommit(connection)
+        flusher = threading.Thread(target=history.flush)
+        flusher.start()
+        committing.wait()
+        self.append_weights(history, [2.0])
+        flusher.join()
+        history.connection = connection
+        history.close()
+
+        reopened = self.open_history()
+        self.assertEqual([row[0] for row in reopened.records(0, len(reopened))], [1.0, 2.0])
+
+    def test_second_converter_is_refused(self):
+        history = self.open_history()
+        self.append_weights(history, [1.0])
+
+        with self.assertRaises(HistoryInUseError):
+            SQLiteHistory(self.path)
+
+        # the first one carries on as normal, and the file is free once it closes
+        self.append_weights(history, [2.0])
+        history.close()
+        self.assertEqual(len(self.open_history()), 2)
+
+    def test_close_unlocks_even_if_the_last_flush_fails(self):
+        # not closed again by the clean up - its unsaved row can never be written
+        history = SQLiteHistory(self.path)
+        self.append_weights(history, [1.0])
+
+        class FailingWrites(ConnectionWrapper):
+            def executemany(self, *details):
+                raise sqlite3.OperationalError("disk I/O error")
+
+        connection = history.connection
+        history.connection = FailingWrites(connection)
+        with self.assertRaises(sqlite3.OperationalError):
+            history.close()
+
+        # the real connection was still closed, so the file can be opened again
+        with self.assertRaises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1")
+        self.assertEqual(len(self.open_history()), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
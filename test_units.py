@@ -0,0 +1,47 @@
+"""
+Checks for the unit registry and its precomputed conversion matrix.
+
+Run with:  python -m pytest
+      or:  python -m unittest
+"""
+
+import unittest
+
+import conversion_rounding as cr
+import units
+
+
+class UnitTests(unittest.TestCase):
+
+    def test_pounds_and_stone_are_exact(self):
+        self.assertAlmostEqual(units.factor("lb", "kg"), 0.45359237, places=15)
+        self.assertAlmostEqual(units.factor("lb", "g"), 453.59237, places=10)
+        self.assertAlmostEqual(units.factor("st", "kg"), 6.35029318, places=12)
+        self.assertEqual(cr.convert_value(10000, "lb", "kg"), 4535.9)
+
+    def test_ounces_keep_the_converters_factor(self):
+        self.assertEqual(units.factor("oz", "g"), 28.35)
+        self.assertEqual(cr.convert_value(16, "oz", "g"), 453.6)
+
+    def test_every_pair_is_the_inverse_of_its_reverse(self):
+        for from_unit in units.UNIT_CODES:
+            for to_unit in units.UNIT_CODES:
+                try:
+                    scale, offset = units.affine(from_unit, to_unit)
+                except ValueError:
+                    continue
+                back_scale, back_offset = units.affine(to_unit, from_unit)
+                message = f"{from_unit} to {to_unit}"
+                self.assertAlmostEqual(scale * back_scale, 1.0, places=12, msg=message)
+                self.assertAlmostEqual(offset * back_scale + back_offset, 0.0, places=9,
+                                       msg=message)
+
+    def test_weights_and_temperatures_do_not_mix(self):
+        with self.assertRaises(ValueError):
+            units.affine("g", "c")
+        with self.assertRaises(ValueError):
+            units.factor("c", "f")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+"""
+Checks for the headless file converter (weight_cli).
+
+Run with:  python -m pytest
+      or:  python -m unittest
+"""
+
+import io
+import math
+import os
+import random
+import tempfile
+import unittest
+from array import array
+from contextlib import redirect_stderr
+from unittest import mock
+
+import conversion_rounding as cr
+import weight_cli
+
+
+def sample_lines(count=5_000):
+    """Weights one per line, with some lines that must be rejected."""
+    rng = random.Random(11)
+    lines = [f"{rng.uniform(0.1, 5000):.2f}".encode() for _ in range(count)]
+    # four bad lines (0.01 is below the lower bound for grams) and one odd but fine
+    odd_lines = {3: b"abc", 10: b"-5", 200: b"", count - 2: b"0.01", count - 1: b"1e3"}
+    for pos, line in odd_lines.items():
+        lines[pos] = line
+    return lines
+
+
+def expected_text(lines, from_unit="g", to_unit="oz"):
+    """What converting the lines one at a time (like the window does) gives."""
+    answers = []
+    for line in lines:
+        try:
+            value = cr.parse_value(line.decode(), from_unit)
+        except ValueError:
+            answers.append("nan\n")
+            continue
+        answers.append(cr.format_ans(cr.convert_value(value, from_unit, to_unit)) + "\n")
+    return "".join(answers).encode()
+
+
+def sample_readings(count=50_000):
+    """float64 readings, with a few below the lower bound for grams."""
+    rng = random.Random(12)
+    readings = array("d", (rng.uniform(0.1, 5000) for _ in range(count)))
+    for pos in (0, 7, count - 1):
+        readings[pos] = -1.0
+    return readings
+
+
+def expected_readings(readings, from_unit="g", to_unit="oz"):
+    return [cr.convert_value(val, from_unit, to_unit) if cr.is_valid(val, from_unit)
+            else math.nan for val in readings]
+
+
+class CliTestCase(unittest.TestCase):
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def write(self, name, data):
+        with open(self.path(name), "wb") as out_file:
+            out_file.write(data)
+        return self.path(name)
+
+    def read(self, name):
+        with open(self.path(name), "rb") as in_file:
+            return in_file.read()
+
+    def run_cli(self, *args):
+        """Run the command line, return (exit code, what it printed to stderr)."""
+        errors = io.StringIO()
+        with redirect_stderr(errors):
+            code = weight_cli.main([str(arg) for arg in args])
+        return code, errors.getvalue()
+
+
+class TextModeTests(CliTestCase):
+
+    def test_matches_one_at_a_time(self):
+        lines = sample_lines()
+        in_path = self.write("in.txt", b"\n".join(lines) + b"\n")
+
+        # a tiny chunk size makes lines straddle the chunk boundaries
+        code, report = self.run_cli(in_path, "-o", self.path("out.txt"), "--chunk-size", 1000)
+
+        self.assertEqual(code, 0)
+        self.assertIn("(4 rejected)", report)
+        self.assertEqual(self.read("out.txt"), expected_text(lines))
+
+    def test_last_line_without_newline(self):
+        in_path = self.write("in.txt", b"10\n20")
+        self.run_cli(in_path, "-o", self.path("out.txt"), "--from", "oz", "--to", "g")
+        self.assertEqual(self.read("out.txt"), b"283.5\n567.0\n")
+
+    def test_without_numpy(self):
+        lines = sample_lines(500)
+        in_path = self.write("in.txt", b"\n".join(lines) + b"\n")
+        with mock.patch.object(cr, "np", None):
+            self.run_cli(in_path, "-o", self.path("out.txt"), "--chunk-size", 333)
+        self.assertEqual(self.read("out.txt"), expected_text(lines))
+
+    def test_units_that_do_not_convert(self):
+        in_path = self.write("in.txt", b"10\n")
+        code, report = self.run_cli(in_path, "--from", "g", "--to", "c")
+        self.assertEqual(code, 2)
+        self.assertIn("Can't convert", report)
+
+
+class BinaryModeTests(CliTestCase):
+
+    def read_readings(self, name):
+        readings = array("d")
+        readings.frombytes(self.read(name))
+        return readings
+
+    def assert_same_readings(self, actual, expected):
+        self.assertEqual(len(actual), len(expected))
+        for pos, (got, wanted) in enumerate(zip(actual, expected)):
+            if math.isnan(wanted):
+                self.assertTrue(math.isnan(got), f"reading {pos}")
+            else:
+                self.assertEqual(got, wanted, f"reading {pos}")
+
+    def test_matches_one_at_a_time(self):
+        readings = sample_readings()
+        in_path = self.write("in.bin", readings.tobytes())
+
+        code, report = self.run_cli("--binary", in_path, "-o", self.path("out.bin"))
+
+        self.assertEqual(code, 0)
+        self.assertIn("(3 rejected)", report)
+        self.assert_same_readings(self.read_readings("out.bin"), expected_readings(readings))
+
+    def test_small_blocks_without_numpy(self):
+        readings = sample_readings(1_000)
+        in_path = self.write("in.bin", readings.tobytes())
+        with mock.patch.object(cr, "np", None):
+            weight_cli.convert_binary(in_path, self.path("out.bin"), "g", "oz", block_values=64)
+        self.assert_same_readings(self.read_readings("out.bin"), expected_readings(readings))
+
+    def test_empty_file(self):
+        in_path = self.write("in.bin", b"")
+        self.assertEqual(self.run_cli("--binary", in_path, "-o", self.path("out.bin"))[0], 0)
+        self.assertEqual(self.read("out.bin"), b"")
+
+    def test_partial_reading_is_refused(self):
+        in_path = self.write("in.bin", b"\0" * 12)
+        code, report = self.run_cli("--binary", in_path, "-o", self.path("out.bin"))
+        self.assertEqual(code, 2)
+        self.assertIn("not a whole number of float64 readings", report)
+
+
+class WorkerTests(CliTestCase):
+
+    def test_text_matches_serial(self):
+        lines = sample_lines(20_000)
+        in_path = self.write("in.txt", b"\n".join(lines) + b"\n")
+
+        serial = self.run_cli(in_path, "-o", self.path("serial.txt"))
+        parallel = self.run_cli(in_path, "-o", self.path("parallel.txt"), "--workers", 3,
+                                "--chunk-size", 4096)
+
+        self.assertEqual(parallel[0], 0)
+        self.assertIn("(4 rejected)", parallel[1])
+        self.assertEqual(self.read("parallel.txt"), self.read("serial.txt"))
+        self.assertIn("(4 rejected)", serial[1])
+        # the workers' pieces are cleaned up once they are stitched together
+        self.assertEqual(sorted(os.listdir(self.folder)), ["in.txt", "parallel.txt", "serial.txt"])
+
+    def test_binary_matches_serial(self):
+        in_path = self.write("in.bin", sample_readings().tobytes())
+
+        self.run_cli("--binary", in_path, "-o", self.path("serial.bin"))
+        code, report = self.run_cli("--binary", in_path, "-o", self.path("parallel.bin"),
+                                    "--workers", 3)
+
+        self.assertEqual(code, 0)
+        self.assertIn("(3 rejected)", report)
+        self.assertEqual(self.read("parallel.bin"), self.read("serial.bin"))
+
+    def test_stdin_can_not_be_split(self):
+        code, report = self.run_cli("--workers", 2)
+        self.assertEqual(code, 2)
+        self.assertIn("--workers needs an input file", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
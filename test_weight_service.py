@@ -0,0 +1,149 @@
+"""
+Checks for the HTTP conversion service (weight_service).
+
+Run with:  python -m pytest
+      or:  python -m unittest
+"""
+
+import asyncio
+import json
+import unittest
+import warnings
+
+import conversion_rounding as cr
+from weight_service import ConversionService, MicroBatcher
+
+
+class ValidationTests(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.service = ConversionService(window=0.001)
+
+    async def get(self, query):
+        return await self.service.route("GET", f"/convert?{query}", b"")
+
+    async def post(self, request):
+        return await self.service.route("POST", "/convert/batch", json.dumps(request).encode())
+
+    async def test_convert_one(self):
+        status, payload = await self.get("value=12&from=g&to=oz")
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["answer"], cr.to_ounces_value(12))
+
+    async def test_bad_single_values(self):
+        for query in ("value=abc", "value=-1", "value=0.01&from=g", "value=inf",
+                      "value=nan", "value=1e400", "value=1e308&from=kg&to=mg"):
+            status, payload = await self.get(query)
+            self.assertEqual(status, 400, query)
+            self.assertIn("error", payload)
+
+    async def test_bad_units(self):
+        for query in ("value=1&from=g&to=c", "value=1&from=stone&to=g"):
+            status, _ = await self.get(query)
+            self.assertEqual(status, 400, query)
+
+        status, _ = await self.post({"values": [1], "from": ["g"], "to": "oz"})
+        self.assertEqual(status, 400)
+
+    async def test_batch_reports_each_bad_value(self):
+        values = [1, "2.5", True, None, "abc", -3, 1e308, [4], 10]
+        status, payload = await self.post({"values": values, "from": "kg", "to": "mg"})
+
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["answers"][0], cr.convert_value(1, "kg", "mg"))
+        self.assertEqual(payload["answers"][1], cr.convert_value(2.5, "kg", "mg"))
+        self.assertEqual(payload["answers"][-1], cr.convert_value(10, "kg", "mg"))
+        self.assertEqual(sorted(error["index"] for error in payload["errors"]),
+                         [2, 3, 4, 5, 6, 7])
+        for error in payload["errors"]:
+            self.assertIsNone(payload["answers"][error["index"]])
+
+    async def test_malformed_batches(self):
+        for body in (b"not json", b'{"value": [1]}', b'{"values": 5}'):
+            status, _ = await self.service.route("POST", "/convert/batch", body)
+            self.assertEqual(status, 400, body)
+
+    async def test_methods_and_paths(self):
+        self.assertEqual((await self.service.route("POST", "/convert", b""))[0], 405)
+        self.assertEqual((await self.service.route("GET", "/convert/batch", b""))[0], 405)
+        self.assertEqual((await self.service.route("GET", "/nowhere", b""))[0], 404)
+
+    async def test_no_warnings_for_huge_values(self):
+        # NumPy's overflow warnings would end up on the service's stderr
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            await self.post({"values": [1e308] * 3, "from": "kg", "to": "mg"})
+        self.assertEqual([str(warning.message) for warning in caught], [])
+
+
+class MicroBatchTests(unittest.IsolatedAsyncioTestCase):
+
+    async def test_requests_in_one_window_share_a_batch(self):
+        service = ConversionService(window=0.05)
+        replies = await asyncio.gather(*[
+            service.route("GET", f"/convert?value={value}&from=oz&to=g", b"")
+            for value in range(1, 101)])
+
+        self.assertEqual([payload["answer"] for _, payload in replies],
+                         [cr.to_grams_value(value) for value in range(1, 101)])
+        self.assertEqual(service.batcher.stats(),
+                         {"batches": 1, "conversions": 100, "mean_batch_size": 100.0})
+
+    async def test_one_batch_per_unit_pair(self):
+        batcher = MicroBatcher(window=0.05)
+        answers = await asyncio.gather(batcher.submit(1.0, "g", "oz"),
+                                       batcher.submit(1.0, "oz", "g"),
+                                       batcher.submit(2.0, "g", "oz"))
+        self.assertEqual(answers, [cr.to_ounces_value(1), cr.to_grams_value(1),
+                                   cr.to_ounces_value(2)])
+        self.assertEqual(batcher.batches, 2)
+
+    async def test_full_batch_is_converted_straight_away(self):
+        # the window is far longer than the test, so only max_batch can flush it
+        batcher = MicroBatcher(window=60, max_batch=10)
+        answers = await asyncio.wait_for(
+            asyncio.gather(*[batcher.submit(float(value), "g", "oz") for value in range(10)]),
+            timeout=5)
+        self.assertEqual(len(answers), 10)
+        self.assertIsNone(batcher.flush_handle)
+
+
+class HttpTests(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.service = ConversionService(window=0.001)
+        self.server = await asyncio.start_server(self.service.handle_client, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", port)
+
+    async def asyncTearDown(self):
+        self.writer.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def request(self, method, target, body=b""):
+        self.writer.write(f"{method} {target} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n"
+                          .encode() + body)
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while (line := await self.reader.readline()) != b"\r\n":
+            name, _, value = line.decode().partition(":")
+            headers[name.lower()] = value.strip()
+        payload = json.loads(await self.reader.readexactly(int(headers["content-length"])))
+        return status, payload
+
+    async def test_keep_alive_requests(self):
+        status, payload = await self.request("GET", "/convert?value=28.35&from=g&to=oz")
+        self.assertEqual((status, payload["answer"]), (200, 1.0))
+
+        body = json.dumps({"values": [1, True], "from": "oz", "to": "g"}).encode()
+        status, payload = await self.request("POST", "/convert/batch", body)
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["answers"], [cr.to_grams_value(1), None])
+
+        status, payload = await self.request("GET", "/stats")
+        self.assertEqual((status, payload["conversions"]), (200, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Fonts and ttk styles shared by every window of the weight converter.
+
+Fonts are created once as named tkinter.font.Font objects and colours
+live in ttk styles, so widgets only name a style. Switching a widget
+between states (eg: normal / error) is then a single style change
+instead of re-configuring its font and colours.
+"""
+
+from tkinter import font
+from tkinter import ttk
+
+# font name -> (family, size, weight)
+FONTS = {
+    "heading": ("Arial", 16, "bold"),
+    "subheading": ("Arial", 14, "bold"),
+    "body": ("Arial", 11, "normal"),
+    "small": ("Arial", 10, "normal"),
+    "entry": ("Arial", 14, "normal"),
+    "answer": ("Arial", 13, "bold"),
+    "error": ("Arial", 10, "bold"),
+    "button": ("Arial", 12, "bold"),
+    "list": ("Arial", 14, "normal"),
+}
+
+# button style (eg: 'Grams.TButton') -> background colour, the text is white
+BUTTON_COLOURS = {
+    "Grams": "#692617",
+    "Ounces": "#193A75",
+    "Help": "#3F1975",
+    "History": "#00B3A4",
+    "Dismiss": "#005CCC",
+    "Export": "#004C99",
+    "Close": "#666666",
+}
+
+HELP_BACKGROUND = "#CCDAFF"
+ANSWER_COLOUR = "#004C99"
+ERROR_COLOUR = "#9C0000"
+ERROR_BACKGROUND = "#F4CCCC"
+SUCCESS_BACKGROUND = "#009900"
+
+# history list background for: every calculation shown, scroll to see all, filtered
+LIST_BACKGROUNDS = {"all": "#D5E8D4", "recent": "#ffe6cc", "filtered": "#DAE8FC"}
+
+
+def named_font(root, name, family, size, weight):
+    """Return the named font, creating it if this Tk instance doesn't have it yet."""
+    made = font.Font(root=root, name=name, exists=name in font.names(root))
+    made.configure(family=family, size=size, weight=weight)
+    return made
+
+
+class Theme:
+    """
+    Named fonts and ttk styles for one Tk instance
+    """
+
+    def __init__(self, root=None):
+        self.fonts = {name: named_font(root, f"Converter{name.title()}", *details)
+                      for name, details in FONTS.items()}
+
+        self.style = ttk.Style(root)
+        # 'clam' lets ttk buttons and entries have their own colours on every platform
+        self.style.theme_use("clam")
+        self.configure_styles()
+
+    def configure_styles(self):
+        style = self.style
+        fonts = self.fonts
+
+        style.configure(".", font=fonts["body"])
+        style.configure("Heading.TLabel", font=fonts["heading"])
+        style.configure("Small.TLabel", font=fonts["small"])
+
+        # answer / error states of the main window
+        style.configure("Answer.TLabel", foreground=ANSWER_COLOUR, font=fonts["answer"])
+        style.configure("Error.TLabel", foreground=ERROR_COLOUR, font=fonts["error"])
+        style.configure("TEntry", fieldbackground="#FFFFFF")
+        style.configure("Error.TEntry", fieldbackground=ERROR_BACKGROUND)
+
+        # export result
+        style.configure("Success.TLabel", background=SUCCESS_BACKGROUND, font=fonts["button"])
+        style.configure("Failed.TLabel", background=ERROR_COLOUR, font=fonts["button"])
+
+        # help window
+        style.configure("Help.TFrame", background=HELP_BACKGROUND)
+        style.configure("Help.TLabel", background=HELP_BACKGROUND)
+        style.configure("HelpHeading.TLabel", background=HELP_BACKGROUND,
+                        font=fonts["subheading"])
+
+        for name, colour in BUTTON_COLOURS.items():
+            style.configure(f"{name}.TButton", background=colour, foreground="#FFFFFF",
+                            font=fonts["button"])
+            style.map(f"{name}.TButton",
+                      background=[("disabled", "#A0A0A0"), ("active", colour)],
+                      foreground=[("disabled", "#E0E0E0")])
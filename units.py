@@ -0,0 +1,119 @@
+"""
+Unit registry for the weight and temperature converters.
+
+Conversions are only defined between neighbouring units (eg: 1 kg = 1000 g,
+F = 1.8 * C + 32). Every conversion is affine (y = scale * x + offset), weights
+simply have an offset of 0. When this module is imported the edges are walked
+once to fill dense scale / offset matrices, so any pair of units converts with
+a single multiply and add.
+"""
+
+import all_constants as c
+
+# unit code | label (used in calculation strings) | name
+UNITS = [
+    ("g", "G", "Grams"),
+    ("oz", "Oz", "Ounces"),
+    ("mg", "mg", "Milligrams"),
+    ("kg", "kg", "Kilograms"),
+    ("lb", "lb", "Pounds"),
+    ("st", "st", "Stone"),
+    ("ct", "ct", "Carats"),
+    ("ozt", "ozt", "Troy Ounces"),
+    ("c", "°C", "Celsius"),
+    ("f", "°F", "Fahrenheit"),
+    ("k", "K", "Kelvin"),
+]
+
+# from unit | to unit | scale | offset ('to' = scale * 'from' + offset)
+# the converter has always used 28.35 g per ounce, so pounds and stone are
+# defined from the exact 1 lb = 0.45359237 kg rather than through ounces
+EDGES = [
+    ("oz", "g", 28.35, 0.0),
+    ("kg", "g", 1000.0, 0.0),
+    ("g", "mg", 1000.0, 0.0),
+    ("lb", "kg", 0.45359237, 0.0),
+    ("st", "lb", 14.0, 0.0),
+    ("ct", "mg", 200.0, 0.0),
+    ("ozt", "g", 31.1034768, 0.0),
+    ("c", "f", 1.8, 32.0),
+    ("c", "k", 1.0, 273.15),
+]
+
+
+def build_factor_matrix(codes, edges):
+    """
+    Works out the scale and offset between every pair of units
+    :param codes: List of unit codes (matrix rows / columns are in this order)
+    :param edges: List of (from unit, to unit, scale, offset) conversions
+    :return: Square list of lists where matrix[from][to] is a (scale, offset)
+             pair, or None when the units can't be converted (eg: g to °C)
+    """
+    index = {code: pos for pos, code in enumerate(codes)}
+
+    # every edge can be walked both ways (x = (y - offset) / scale)
+    neighbours = [[] for _ in codes]
+    for from_unit, to_unit, scale, offset in edges:
+        neighbours[index[from_unit]].append((index[to_unit], scale, offset))
+        neighbours[index[to_unit]].append((index[from_unit], 1 / scale, -offset / scale))
+
+    matrix = []
+    for start in range(len(codes)):
+        # breadth first walk, chaining the conversions along the way
+        row = [None] * len(codes)
+        row[start] = (1.0, 0.0)
+        to_visit = [start]
+        for unit in to_visit:
+            unit_scale, unit_offset = row[unit]
+            for next_unit, scale, offset in neighbours[unit]:
+                if row[next_unit] is None:
+                    row[next_unit] = (unit_scale * scale, unit_offset * scale + offset)
+                    to_visit.append(next_unit)
+        matrix.append(row)
+
+    return matrix
+
+
+UNIT_CODES = [unit[0] for unit in UNITS]
+UNIT_LABELS = {unit[0]: unit[1] for unit in UNITS}
+UNIT_NAMES = {unit[0]: unit[2] for unit in UNITS}
+UNIT_INDEX = {code: pos for pos, code in enumerate(UNIT_CODES)}
+
+MATRIX = build_factor_matrix(UNIT_CODES, EDGES)
+
+
+def affine(from_unit, to_unit):
+    """
+    Looks up the conversion between two units
+    :param from_unit: Unit code to convert from (eg: 'c')
+    :param to_unit: Unit code to convert to (eg: 'f')
+    :return: (scale, offset) pair so that answer = scale * value + offset
+    """
+    pair = MATRIX[UNIT_INDEX[from_unit]][UNIT_INDEX[to_unit]]
+    if pair is None:
+        raise ValueError(f"Can't convert {UNIT_NAMES[from_unit]} "
+                         f"to {UNIT_NAMES[to_unit]}")
+    return pair
+
+
+def factor(from_unit, to_unit):
+    """
+    Looks up the conversion factor between two purely multiplicative units
+    :param from_unit: Unit code to convert from (eg: 'g')
+    :param to_unit: Unit code to convert to (eg: 'oz')
+    :return: Number to multiply a 'from unit' weight by
+    """
+    scale, offset = affine(from_unit, to_unit)
+    if offset:
+        raise ValueError(f"{UNIT_NAMES[from_unit]} to {UNIT_NAMES[to_unit]} "
+                         f"is not a simple multiply")
+    return scale
+
+
+def lower_bound(unit):
+    """
+    Looks up the smallest value allowed for a unit
+    :param unit: Unit code (eg: 'g')
+    :return: Lower bound from all_constants.LOWER_BOUNDS
+    """
+    return c.LOWER_BOUNDS[unit]
@@ -0,0 +1,451 @@
+"""
+Headless weight converter for large newline-delimited files.
+
+Reads weights (one per line) from a file or stdin in large chunks, converts
+them in batches with conversion_rounding and writes the answers as it goes,
+so memory stays flat however big the input is. Lines that can't be
+converted are written as 'nan', so output line N always answers input line N.
+
+With --binary the input is a file of raw little-endian float64 readings.
+It is memory-mapped and converted block by block straight into a
+memory-mapped output file of the same layout (rejected readings become NaN),
+so files bigger than RAM convert at close to disk speed.
+
+With --workers N a file is split into byte ranges (on line boundaries for
+text, on whole readings for binary) which are converted in separate
+processes, then stitched back together in the original order.
+
+Usage:  python weight_cli.py --from g --to oz [input] [-o output]
+        python weight_cli.py --binary --from g --to oz input -o output
+        python weight_cli.py --workers 4 --from g --to oz input -o output
+"""
+
+import argparse
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import conversion_rounding as cr
+import units
+
+CHUNK_SIZE = 4 * 1024 * 1024  # bytes read from the input at a time
+MAX_FAST_LINE = 64  # longest line parsed by NumPy in one go
+BLOCK_VALUES = 1024 * 1024  # float64 readings converted at a time in binary mode
+
+
+def parse_batch(lines):
+    """
+    Parses a batch of lines into floats, following the rules of check_weight
+    :param lines: List of bytes objects, one weight per line
+    :return: (values, ok) - float64 values and a list / mask of parsed lines
+    """
+    # fast path - the whole batch is numbers (skipped when a stray long
+    # line would blow up the fixed-width bytes array NumPy makes)
+    if cr.np is not None and max(map(len, lines)) <= MAX_FAST_LINE:
+        try:
+            return cr.np.array(lines).astype(cr.np.float64), None
+        except ValueError:
+            pass
+
+    values = []
+    ok = []
+    for line in lines:
+        try:
+            values.append(float(line))
+            ok.append(True)
+        except ValueError:
+            values.append(0.0)
+            ok.append(False)
+
+    if cr.np is not None:
+        return cr.np.array(values, dtype=cr.np.float64), cr.np.array(ok)
+    return values, ok
+
+
+def convert_lines(lines, from_unit, to_unit):
+    """
+    Validates and converts a batch of lines
+    :param lines: List of bytes objects, one weight per line
+    :param from_unit: Unit code of the weights
+    :param to_unit: Unit code to convert to
+    :return: (output bytes, number converted, number rejected)
+    """
+    if not lines:
+        return b"", 0, 0
+
+    values, ok = parse_batch(lines)
+    valid = cr.valid_batch(values, from_unit)
+    answers = cr.convert_batch(values, from_unit, to_unit)
+
+    # rejected lines become 'nan' (like binary mode) to keep the input's layout
+    if cr.np is not None:
+        if ok is not None:
+            valid &= ok
+        answers[~valid] = cr.np.nan
+        rejected = len(valid) - int(cr.np.count_nonzero(valid))
+    else:
+        rejected = 0
+        for pos, (good, parsed) in enumerate(zip(valid, ok)):
+            if not (good and parsed):
+                answers[pos] = float("nan")
+                rejected += 1
+
+    text = cr.format_batch(answers)
+    return text.encode("ascii"), len(lines) - rejected, rejected
+
+
+def convert_stream(in_file, out_file, from_unit, to_unit, chunk_size=CHUNK_SIZE):
+    """
+    Converts a binary stream of newline-delimited weights chunk by chunk
+    :param in_file: Binary file object to read from
+    :param out_file: Binary file object to write answers to
+    :param from_unit: Unit code of the weights
+    :param to_unit: Unit code to convert to
+    :param chunk_size: Number of bytes to read at a time
+    :return: (number converted, number rejected)
+    """
+    converted = 0
+    rejected = 0
+    leftover = b""
+
+    while True:
+        chunk = in_file.read(chunk_size)
+        if not chunk:
+            break
+
+        # keep any partial last line for the next chunk
+        lines = (leftover + chunk).split(b"\n")
+        leftover = lines.pop()
+
+        output, good, bad = convert_lines(lines, from_unit, to_unit)
+        out_file.write(output)
+        converted += good
+        rejected += bad
+
+    if leftover.strip():
+        output, good, bad = convert_lines([leftover], from_unit, to_unit)
+        out_file.write(output)
+        converted += good
+        rejected += bad
+
+    return converted, rejected
+
+
+def convert_block(values, from_unit, to_unit):
+    """
+    Converts a block of float64 readings, rejected readings become NaN
+    :param values: float64 readings (NumPy array or memoryview)
+    :param from_unit: Unit code of the readings
+    :param to_unit: Unit code to convert to
+    :return: (converted float64 array, number rejected)
+    """
+    answers = cr.convert_batch(values, from_unit, to_unit)
+    valid = cr.valid_batch(values, from_unit)
+
+    if cr.np is not None:
+        rejected = len(valid) - int(cr.np.count_nonzero(valid))
+        answers[~valid] = cr.np.nan
+        return answers, rejected
+
+    rejected = 0
+    for pos, good in enumerate(valid):
+        if not good:
+            answers[pos] = float("nan")
+            rejected += 1
+    return answers, rejected
+
+
+def convert_binary(in_path, out_path, from_unit, to_unit, block_values=BLOCK_VALUES):
+    """
+    Converts a file of little-endian float64 readings using memory maps
+    :param in_path: File of raw float64 readings
+    :param out_path: File to write the converted float64 readings to
+    :param from_unit: Unit code of the readings
+    :param to_unit: Unit code to convert to
+    :param block_values: Number of readings converted at a time
+    :return: (number converted, number rejected)
+    """
+    size = os.path.getsize(in_path)
+    if size % 8:
+        raise ValueError(f"{in_path} is not a whole number of float64 readings")
+
+    with open(in_path, "rb") as in_file, open(out_path, "w+b") as out_file:
+        out_file.truncate(size)
+        if not size:
+            return 0, 0
+
+        with mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ) as in_map, \
+                mmap.mmap(out_file.fileno(), 0, access=mmap.ACCESS_WRITE) as out_map:
+            rejected = convert_mapped(in_map, out_map, from_unit, to_unit, block_values)
+            out_map.flush()
+
+    return size // 8 - rejected, rejected
+
+
+def convert_mapped(in_buffer, out_buffer, from_unit, to_unit, block_values=BLOCK_VALUES):
+    """
+    Converts float64 readings from one buffer into another of the same size
+    :param in_buffer: Buffer of little-endian float64 readings (eg: an mmap)
+    :param out_buffer: Writable buffer to put the converted readings in
+    :param from_unit: Unit code of the readings
+    :param to_unit: Unit code to convert to
+    :param block_values: Number of readings converted at a time
+    :return: Number of readings rejected
+    """
+    rejected = 0
+
+    if cr.np is not None:
+        # zero copy views straight over the buffers
+        readings = cr.np.frombuffer(in_buffer, dtype="<f8")
+        answers = cr.np.frombuffer(out_buffer, dtype="<f8")
+        for start in range(0, len(readings), block_values):
+            block, bad = convert_block(readings[start:start + block_values],
+                                       from_unit, to_unit)
+            answers[start:start + block_values] = block
+            rejected += bad
+        del readings, answers  # release the buffers so the maps can close
+        return rejected
+
+    readings = memoryview(in_buffer).cast("d")
+    answers = memoryview(out_buffer).cast("d")
+    for start in range(0, len(readings), block_values):
+        values = readings[start:start + block_values]
+        if sys.byteorder == "big":
+            values = array("d", values)
+            values.byteswap()
+        block, bad = convert_block(values, from_unit, to_unit)
+        if sys.byteorder == "big":
+            block.byteswap()
+        answers[start:start + block_values] = block
+        rejected += bad
+    readings.release()
+    answers.release()
+    return rejected
+
+
+# ---------- Multi-process conversion ----------
+
+def split_text_ranges(path, parts):
+    """
+    Splits a text file into byte ranges that start and end on line boundaries
+    :param path: File to split
+    :param parts: Number of ranges wanted (fewer are returned for tiny files)
+    :return: List of (start, end) byte offsets
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as in_file:
+        for part in range(1, parts):
+            in_file.seek(max(size * part // parts, bounds[-1]))
+            in_file.readline()  # move on to the start of the next line
+            bounds.append(min(in_file.tell(), size))
+    bounds.append(size)
+
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def split_binary_ranges(path, parts):
+    """
+    Splits a binary file into byte ranges holding whole float64 readings
+    :param path: File to split
+    :param parts: Number of ranges wanted (fewer are returned for tiny files)
+    :return: List of (start, end) byte offsets
+    """
+    readings = os.path.getsize(path) // 8
+    bounds = [readings * part // parts * 8 for part in range(parts + 1)]
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+class RangeReader:
+    """
+    Read-only file wrapper that stops at the end of a byte range
+    """
+
+    def __init__(self, in_file, start, end):
+        in_file.seek(start)
+        self.in_file = in_file
+        self.remaining = end - start
+
+    def read(self, size):
+        chunk = self.in_file.read(min(size, self.remaining))
+        self.remaining -= len(chunk)
+        return chunk
+
+
+def convert_text_range(in_path, start, end, out_dir, from_unit, to_unit, chunk_size):
+    """
+    Worker - converts one byte range of a text file into a temporary file
+    :return: (temporary file path, number converted, number rejected)
+    """
+    with open(in_path, "rb") as in_file, \
+            tempfile.NamedTemporaryFile("wb", dir=out_dir, delete=False,
+                                        prefix=".weights_part_") as out_file:
+        converted, rejected = convert_stream(RangeReader(in_file, start, end), out_file,
+                                             from_unit, to_unit, chunk_size)
+    return out_file.name, converted, rejected
+
+
+def convert_binary_range(in_path, out_path, start, end, from_unit, to_unit):
+    """
+    Worker - converts one byte range of a binary file into the same range of the output
+    :return: (number converted, number rejected)
+    """
+    with open(in_path, "rb") as in_file, open(out_path, "r+b") as out_file, \
+            mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ) as in_map, \
+            mmap.mmap(out_file.fileno(), 0, access=mmap.ACCESS_WRITE) as out_map:
+        in_view = memoryview(in_map)[start:end]
+        out_view = memoryview(out_map)[start:end]
+        rejected = convert_mapped(in_view, out_view, from_unit, to_unit)
+        in_view.release()
+        out_view.release()
+        out_map.flush()
+
+    return (end - start) // 8 - rejected, rejected
+
+
+def convert_parallel(in_path, out_file, from_unit, to_unit, workers,
+                     binary=False, chunk_size=CHUNK_SIZE, out_dir=None):
+    """
+    Converts a file using a pool of worker processes
+    :param in_path: File to convert
+    :param out_file: Binary file object (text mode) or output path (binary mode)
+    :param from_unit: Unit code of the input
+    :param to_unit: Unit code to convert to
+    :param workers: Number of worker processes
+    :param binary: True if the files hold raw float64 readings
+    :param chunk_size: Bytes each text worker reads at a time
+    :param out_dir: Folder for the text workers' temporary files (None for the system default)
+    :return: (number converted, number rejected)
+    """
+    # a few ranges per worker keeps them all busy if some ranges are slower
+    parts = workers * 4
+    converted = 0
+    rejected = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if binary:
+            size = os.path.getsize(in_path)
+            if size % 8:
+                raise ValueError(f"{in_path} is not a whole number of float64 readings")
+            with open(out_file, "wb") as out:
+                out.truncate(size)
+            if not size:
+                return 0, 0
+
+            jobs = [pool.submit(convert_binary_range, in_path, out_file, start, end,
+                                from_unit, to_unit)
+                    for start, end in split_binary_ranges(in_path, parts)]
+            for job in jobs:
+                good, bad = job.result()
+                converted += good
+                rejected += bad
+            return converted, rejected
+
+        jobs = [pool.submit(convert_text_range, in_path, start, end, out_dir,
+                            from_unit, to_unit, chunk_size)
+                for start, end in split_text_ranges(in_path, parts)]
+
+        # stitch the pieces back together in their original order
+        try:
+            for job in jobs:
+                part_path, good, bad = job.result()
+                with open(part_path, "rb") as part:
+                    shutil.copyfileobj(part, out_file, chunk_size)
+                converted += good
+                rejected += bad
+        finally:
+            for job in jobs:
+                if not job.cancelled() and job.exception() is None:
+                    part_path = job.result()[0]
+                    if os.path.exists(part_path):
+                        os.remove(part_path)
+
+    return converted, rejected
+
+
+def make_parser():
+    """Command line options for the converter."""
+    parser = argparse.ArgumentParser(
+        description="Convert newline-delimited weights without the GUI.")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="file to convert ('-' or nothing for stdin)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="file to write answers to ('-' for stdout)")
+    parser.add_argument("--from", dest="from_unit", default="g",
+                        choices=units.UNIT_CODES, help="unit of the input (default g)")
+    parser.add_argument("--to", dest="to_unit", default="oz",
+                        choices=units.UNIT_CODES, help="unit to convert to (default oz)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="bytes to read at a time")
+    parser.add_argument("--binary", action="store_true",
+                        help="input / output are raw little-endian float64 files")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes to convert with (default 1)")
+    return parser
+
+
+def convert_text(args):
+    """Runs the newline-delimited conversion for the parsed command line."""
+    in_file = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    out_file = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+
+    try:
+        if args.workers > 1:
+            out_dir = None if args.output == "-" else os.path.dirname(
+                os.path.abspath(args.output))
+            return convert_parallel(args.input, out_file, args.from_unit, args.to_unit,
+                                    args.workers, chunk_size=args.chunk_size,
+                                    out_dir=out_dir)
+        return convert_stream(in_file, out_file, args.from_unit,
+                              args.to_unit, args.chunk_size)
+    finally:
+        if in_file is not sys.stdin.buffer:
+            in_file.close()
+        if out_file is not sys.stdout.buffer:
+            out_file.close()
+
+
+def main(argv=None):
+    args = make_parser().parse_args(argv)
+
+    try:
+        units.affine(args.from_unit, args.to_unit)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+
+    if args.binary and (args.input == "-" or args.output == "-"):
+        print("--binary needs an input and an output file", file=sys.stderr)
+        return 2
+    if args.workers > 1 and args.input == "-":
+        print("--workers needs an input file (stdin can't be split)", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    try:
+        if args.binary and args.workers > 1:
+            converted, rejected = convert_parallel(args.input, args.output, args.from_unit,
+                                                   args.to_unit, args.workers, binary=True)
+        elif args.binary:
+            converted, rejected = convert_binary(args.input, args.output,
+                                                 args.from_unit, args.to_unit)
+        else:
+            converted, rejected = convert_text(args)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+    taken = time.perf_counter() - start
+
+    rate = converted / taken if taken else 0
+    print(f"Converted {converted:,} values ({rejected:,} rejected) "
+          f"in {taken:.2f}s - {rate:,.0f} values/sec", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
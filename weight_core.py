@@ -0,0 +1,180 @@
+"""
+Headless core of the weight converter.
+
+Validation, conversion and calculation history live here with no tkinter
+dependency, so services and scripts can use them without a display.
+Weight_Converter_V2.py is a thin Tk view on top of this module.
+"""
+
+import all_constants as c
+import conversion_rounding as cr
+from history_store import CalculationHistory, render_calculation
+from session_stats import SessionStats
+
+
+# ---------- Helper functions ----------
+
+def build_calculation_string(calculations, max_calcs):
+    """Return a newline-separated string of calculations, newest first."""
+    if hasattr(calculations, "newest"):
+        return "\n".join(calculations.newest(max_calcs))
+
+    # plain list - only reverse the items that will be shown
+    newest_first_list = calculations[max(len(calculations) - max_calcs, 0):]
+    return "\n".join(reversed(newest_first_list))
+
+
+def history_intro(total, max_calcs):
+    """
+    Works out the intro text for the history window
+    :param total: Number of calculations in the history
+    :param max_calcs: Number of calculations the window shows
+    :return: (intro text, True if every calculation is shown)
+    """
+    if total <= max_calcs:
+        return "Below are all your calculations ", True
+
+    return (f"Below are your calculations, newest first - "
+            f"scroll to see all {total:,}"), False
+
+
+# ---------- Converter core ----------
+
+class ConverterCore:
+    """
+    Weight conversion, validation and history (no widgets)
+    """
+
+    def __init__(self, max_calcs=c.MAX_CALCS, history_db=None):
+        self.max_calcs = max_calcs
+
+        # strings are rendered from this on demand (see history_store.py),
+        # or it is kept in an SQLite file if one is given (see history_sqlite.py)
+        if history_db:
+            from history_sqlite import SQLiteHistory
+            self.all_calculations_list = SQLiteHistory(history_db, max_calcs)
+        else:
+            self.all_calculations_list = CalculationHistory(max_calcs)
+
+        # history window intro, kept up to date as calculations come in
+        # (the window draws the calculations themselves, see history_view.py)
+        self.recent_intro, self.showing_all = history_intro(0, max_calcs)
+
+        # running count / mean / variance etc. of this session's conversions
+        self.stats = SessionStats()
+
+        # functions called with the core after every conversion
+        self.listeners = []
+
+        # remembers what has already been exported today (made on the first export)
+        self.exporter = None
+
+        # sorted index for filtering, built the first time it is needed
+        self.index = None
+
+        # a persistent history may already have calculations in it
+        self.update_intro()
+
+    def check_weight(self, to_convert, from_unit):
+        """
+        Checks a weight typed by the user
+        :param to_convert: Text (or number) to be converted
+        :param from_unit: Unit code of the weight
+        :return: The weight as a float
+        :raises ValueError: With the error message to show the user
+        """
+        return cr.parse_value(to_convert, from_unit)
+
+    def convert(self, from_unit, to_unit, to_convert):
+        """
+        Converts a (valid) weight and records it in the history
+        :param from_unit: Unit code of the weight
+        :param to_unit: Unit code to convert to
+        :param to_convert: Weight to be converted
+        :return: Calculation string (eg: '12.0G is 0.4Oz')
+        """
+        answer = cr.convert_value(to_convert, from_unit, to_unit)
+        self.all_calculations_list.append(to_convert, from_unit, to_unit, answer)
+        self.stats.add(from_unit, to_unit, to_convert)
+        self.update_intro()
+
+        for listener in list(self.listeners):
+            listener(self)
+        return self.all_calculations_list.newest(1)[0]
+
+    def preview(self, from_unit, to_unit, to_convert):
+        """
+        Converts a (valid) weight without recording it (eg: while the user is typing)
+        :return: Calculation string (eg: '12.0G is 0.4Oz')
+        """
+        answer = cr.convert_value(to_convert, from_unit, to_unit)
+        return render_calculation(to_convert, from_unit, to_unit, answer)
+
+    def update_intro(self):
+        """Refreshes the history window intro (it only needs the number of calculations)."""
+        self.recent_intro, self.showing_all = history_intro(
+            len(self.all_calculations_list), self.max_calcs)
+
+    def filter_history(self, from_unit, low=None, high=None):
+        """
+        Finds conversions from a unit with an input value in a range
+        :param from_unit: Unit code of the input values
+        :param low: Smallest value wanted (None for no lower limit)
+        :param high: Largest value wanted (None for no upper limit)
+        :return: Lazy sequence of calculation strings, sorted by input value
+        """
+        if self.index is None:
+            from history_index import HistoryIndex
+            self.index = HistoryIndex(self.all_calculations_list)
+        return self.index.query(from_unit, low, high)
+
+    def add_listener(self, listener):
+        """Call 'listener(core)' after every conversion (eg: an open history window)."""
+        # adding the same listener twice would run it twice per conversion
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def export_source(self, date_obj):
+        """The calculations to export - just that day's if the history is persistent."""
+        history = self.all_calculations_list
+        if hasattr(history, "for_day"):
+            return history.for_day(date_obj)
+        return history
+
+    def get_exporter(self):
+        """The IncrementalExporter (the export code is only imported when first needed)."""
+        if self.exporter is None:
+            from history_export import IncrementalExporter
+            self.exporter = IncrementalExporter()
+        return self.exporter
+
+    def export(self, date_obj):
+        """
+        Exports the history to the file for the given day (only new
+        calculations are appended if the file was exported earlier today)
+        :return: (file name, number of bytes written)
+        """
+        return self.get_exporter().export(self.export_source(date_obj), date_obj,
+                                          stats_lines=self.stats.lines())
+
+    def export_in_background(self, date_obj):
+        """
+        Starts an export on a worker thread
+        :return: The running BackgroundExport (read its 'messages' queue for progress)
+        """
+        from history_export import BackgroundExport
+        return BackgroundExport(self.get_exporter(), self.export_source(date_obj), date_obj,
+                                self.stats.lines()).start()
+
+    def flush(self):
+        """Writes any batched calculations to a persistent history."""
+        if hasattr(self.all_calculations_list, "flush"):
+            self.all_calculations_list.flush()
+
+    def close(self):
+        if hasattr(self.all_calculations_list, "close"):
+            self.all_calculations_list.close()
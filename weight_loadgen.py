@@ -0,0 +1,129 @@
+"""
+Load generator for weight_service.py.
+
+Opens a number of keep-alive connections and fires single conversions at
+the service as fast as it answers, then reports p50 / p99 latency and
+requests per second.
+
+Usage:  python weight_loadgen.py [--spawn] [--connections 50] [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+SERVICE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "weight_service.py")
+
+
+def percentile(sorted_values, percent):
+    """Value below which 'percent' % of the (sorted) values fall."""
+    if not sorted_values:
+        return 0.0
+    pos = min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))
+    return sorted_values[pos]
+
+
+async def client(host, port, count, latencies, errors):
+    """One keep-alive connection sending 'count' requests one after another."""
+    reader, writer = await asyncio.open_connection(host, port)
+    rng = random.Random()
+
+    try:
+        for _ in range(count):
+            value = round(rng.uniform(0.1, 5000), 2)
+            request = (f"GET /convert?value={value}&from=g&to=oz HTTP/1.1\r\n"
+                       f"Host: {host}\r\n\r\n").encode("latin-1")
+
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+
+            if b" 200 " not in status_line:
+                errors.append(status_line)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, connections, requests):
+    """
+    Runs the load test
+    :return: (sorted latencies in seconds, number of errors, total seconds)
+    """
+    latencies = []
+    errors = []
+    per_client = max(1, requests // connections)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, per_client, latencies, errors)
+                           for _ in range(connections)))
+    taken = time.perf_counter() - start
+
+    return sorted(latencies), len(errors), taken
+
+
+async def wait_for_port(host, port, timeout=10.0):
+    """Waits for a spawned service to start listening."""
+    give_up = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > give_up:
+                raise
+            await asyncio.sleep(0.05)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator for weight_service.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--spawn", action="store_true",
+                        help="start weight_service.py locally for the test")
+    parser.add_argument("--window-ms", type=float, default=2.0,
+                        help="batching window for the spawned service")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen([sys.executable, SERVICE_SCRIPT,
+                                   "--host", args.host, "--port", str(args.port),
+                                   "--window-ms", str(args.window_ms)],
+                                  stdout=subprocess.DEVNULL)
+
+    try:
+        asyncio.run(wait_for_port(args.host, args.port))
+        latencies, errors, taken = asyncio.run(
+            run_load(args.host, args.port, args.connections, args.requests))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"---- {len(latencies):,} requests over {args.connections} connections ----")
+    print(f"requests/sec : {len(latencies) / taken:>10,.0f}")
+    print(f"p50 latency  : {percentile(latencies, 50) * 1000:>10.2f} ms")
+    print(f"p99 latency  : {percentile(latencies, 99) * 1000:>10.2f} ms")
+    print(f"errors       : {errors:>10,}")
+
+
+if __name__ == "__main__":
+    main()
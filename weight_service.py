@@ -0,0 +1,277 @@
+"""
+HTTP conversion service built on asyncio (standard library only).
+
+Endpoints (all answers are JSON):
+    GET  /convert?value=12&from=g&to=oz    convert one value
+    POST /convert/batch                    {"values": [...], "from": "g", "to": "oz"}
+    GET  /stats                            micro-batching counters
+
+Single conversions that arrive within a short window are coalesced into
+one conversion_rounding.convert_batch call. Input is checked with the same
+rules as the converter window (conversion_rounding.parse_value).
+
+Usage:  python weight_service.py [--host 127.0.0.1] [--port 8080] [--window-ms 2]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+from urllib.parse import parse_qs, urlsplit
+
+import conversion_rounding as cr
+import units
+
+MAX_BODY = 16 * 1024 * 1024  # largest request body accepted (bytes)
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class MicroBatcher:
+    """
+    Collects single conversions for a short window, then converts them in one batch
+    """
+
+    def __init__(self, window=0.002, max_batch=4096):
+        self.window = window
+        self.max_batch = max_batch
+
+        # (from unit, to unit) -> list of (value, future)
+        self.pending = {}
+        self.pending_count = 0
+        self.flush_handle = None
+
+        self.batches = 0
+        self.conversions = 0
+
+    def submit(self, value, from_unit, to_unit):
+        """
+        Queues a validated value for conversion
+        :return: Future that resolves to the rounded answer
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.setdefault((from_unit, to_unit), []).append((value, future))
+        self.pending_count += 1
+
+        if self.pending_count >= self.max_batch:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.window, self.flush)
+        return future
+
+    def flush(self):
+        """Converts everything queued so far, one batch per unit pair."""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+
+        pending, self.pending = self.pending, {}
+        self.pending_count = 0
+
+        for (from_unit, to_unit), items in pending.items():
+            answers = cr.convert_batch([item[0] for item in items], from_unit, to_unit)
+            for (_, future), answer in zip(items, answers.tolist()):
+                if not future.done():
+                    future.set_result(answer)
+            self.batches += 1
+            self.conversions += len(items)
+
+    def stats(self):
+        """Counters for the /stats endpoint."""
+        mean = self.conversions / self.batches if self.batches else 0
+        return {"batches": self.batches, "conversions": self.conversions,
+                "mean_batch_size": round(mean, 2)}
+
+
+class ConversionService:
+    """
+    Minimal HTTP/1.1 server (with keep-alive) for weight conversions
+    """
+
+    def __init__(self, window=0.002, max_batch=4096):
+        self.batcher = MicroBatcher(window, max_batch)
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "Malformed request"}, False)
+                    break
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, {"error": "Request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, payload = await self.route(method, target, body)
+                except Exception as error:
+                    # always answer, rather than dropping the connection
+                    status, payload = 500, {"error": f"Internal error: {error}"}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive):
+        try:
+            body = json.dumps(payload, allow_nan=False).encode("utf-8")
+        except ValueError:
+            # Infinity / NaN aren't valid JSON
+            status = 500
+            body = json.dumps({"error": "Result is not a finite number"}).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def route(self, method, target, body):
+        """
+        Works out which endpoint a request is for
+        :return: (HTTP status, JSON-able payload)
+        """
+        url = urlsplit(target)
+
+        if url.path == "/convert":
+            if method != "GET":
+                return 405, {"error": "Use GET for /convert"}
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            return await self.convert_one(query.get("value", ""),
+                                          query.get("from", "g"), query.get("to", "oz"))
+
+        if url.path == "/convert/batch":
+            if method != "POST":
+                return 405, {"error": "Use POST for /convert/batch"}
+            try:
+                request = json.loads(body or b"{}")
+                values = request["values"]
+                if not isinstance(values, list):
+                    raise TypeError
+            except (ValueError, KeyError, TypeError):
+                return 400, {"error": 'Expected JSON like {"values": [...], "from": "g", "to": "oz"}'}
+            return self.convert_many(values, request.get("from", "g"), request.get("to", "oz"))
+
+        if url.path == "/stats":
+            return 200, self.batcher.stats()
+
+        return 404, {"error": f"No endpoint called {url.path}"}
+
+    @staticmethod
+    def check_units(from_unit, to_unit):
+        """Returns an error message if the units can't be converted, otherwise None."""
+        if (not isinstance(from_unit, str) or not isinstance(to_unit, str)
+                or from_unit not in units.UNIT_INDEX or to_unit not in units.UNIT_INDEX):
+            return f"Units must be one of {', '.join(units.UNIT_CODES)}"
+        try:
+            units.affine(from_unit, to_unit)
+        except ValueError as error:
+            return str(error)
+        return None
+
+    @staticmethod
+    def parse_finite(to_convert, from_unit):
+        """
+        Checks a value like the converter window does, and that it is finite
+        :raises ValueError: With the error message for the client
+        """
+        value = cr.parse_value(to_convert, from_unit)
+        if not math.isfinite(value):
+            raise ValueError("Enter a finite number")
+        return value
+
+    async def convert_one(self, to_convert, from_unit, to_unit):
+        error = self.check_units(from_unit, to_unit)
+        if error:
+            return 400, {"error": error}
+
+        try:
+            value = self.parse_finite(to_convert, from_unit)
+        except ValueError as error:
+            return 400, {"error": str(error)}
+
+        answer = await self.batcher.submit(value, from_unit, to_unit)
+        if not math.isfinite(answer):
+            return 400, {"error": "Answer is too large to convert"}
+        return 200, {"value": value, "from": from_unit, "to": to_unit, "answer": answer}
+
+    def convert_many(self, values, from_unit, to_unit):
+        error = self.check_units(from_unit, to_unit)
+        if error:
+            return 400, {"error": error}
+
+        # invalid values get a null answer and an entry in 'errors'
+        good_values = []
+        good_positions = []
+        errors = []
+        for pos, to_convert in enumerate(values):
+            try:
+                good_values.append(self.parse_finite(to_convert, from_unit))
+                good_positions.append(pos)
+            except ValueError as problem:
+                errors.append({"index": pos, "error": str(problem)})
+
+        answers = [None] * len(values)
+        converted = cr.convert_batch(good_values, from_unit, to_unit).tolist()
+        for pos, answer in zip(good_positions, converted):
+            if math.isfinite(answer):
+                answers[pos] = answer
+            else:
+                errors.append({"index": pos, "error": "Answer is too large to convert"})
+
+        return 200, {"from": from_unit, "to": to_unit, "answers": answers, "errors": errors}
+
+
+async def serve(host="127.0.0.1", port=8080, window=0.002, max_batch=4096):
+    service = ConversionService(window, max_batch)
+    server = await asyncio.start_server(service.handle_client, host, port)
+    print(f"Weight conversion service on http://{host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Weight conversion HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--window-ms", type=float, default=2.0,
+                        help="how long single conversions wait to be batched")
+    parser.add_argument("--max-batch", type=int, default=4096,
+                        help="flush a batch early once this many are waiting")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.window_ms / 1000, args.max_batch))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()